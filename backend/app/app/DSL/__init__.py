@@ -1,4 +1,12 @@
+from .dsl_parser import DSL_VERSION  # noqa
 from .dsl_parser import dsl_parser  # noqa
+from .dsl_parser import resolve  # noqa
+from .dsl_parser import warm  # noqa
+from .ordo import gen_ordo  # noqa
+from .ordo import group_by_date  # noqa
+from .packed import PACKED_FORMAT  # noqa
+from .packed import pack_dates  # noqa
+from .packed import unpack_dates  # noqa
 from .util import days  # noqa
 from .util import months  # noqa
 from .util import ordinals  # noqa
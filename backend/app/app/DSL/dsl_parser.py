@@ -22,10 +22,12 @@ to only one date in any one year.
 """
 
 from datetime import date
+from functools import lru_cache
+from typing import Dict, Iterable, Tuple
 
 from dateutil import easter
 from dateutil.relativedelta import FR, MO, SA, SU, TH, TU, WE, relativedelta
-from pyparsing import Group, Optional, Regex, Word, nums, oneOf
+from pyparsing import Group, Optional, ParserElement, Regex, Word, nums, oneOf
 
 try:
     from .util import days
@@ -37,6 +39,11 @@ except ImportError:
     from util import ordinals
 
 
+# Bump whenever a change to the parser could change what it resolves to,
+# so that memoised resolutions are invalidated.
+DSL_VERSION = "1"
+
+
 class DSLError(Exception):
     pass
 
@@ -55,6 +62,20 @@ specials = {
 }
 
 
+@lru_cache(maxsize=256)
+def resolve_specials(year: int) -> Dict[str, date]:
+    """
+    Resolve every special for a given year.
+
+    The table is computed once per year and shared, so don't modify it.
+
+    >>> from app.DSL.dsl_parser import resolve_specials
+    >>> resolve_specials(2020)["Pentecost"]
+    datetime.date(2020, 5, 31)
+    """
+    return {k: v(year) for k, v in specials.items()}
+
+
 def _parse_and(t):
     """Parse AND expression."""
     try:
@@ -107,6 +128,67 @@ def _parse_timedelta(t):
         return d + relativedelta(weeks=cardinal, weekday=weekday)
 
 
+@lru_cache(maxsize=256)
+def build_year_grammar(year: int) -> Tuple[ParserElement, ParserElement]:
+    """Build the parsers for specials and yearless dates in a given year."""
+    anchors = resolve_specials(year)
+    special = oneOf(specials.keys())
+    special.setParseAction(lambda t: str(anchors[t[0]]) + " ")
+    _specials = special[...]
+
+    yearless = Word(nums) + oneOf(months)
+    yearless.setParseAction(
+        lambda t: str(date(year, months.index(t[1]) + 1, int(t[0]))) + " "
+    )
+    _yearless = yearless[...]
+    return _specials, _yearless
+
+
+@lru_cache(maxsize=None)
+def build_grammar() -> Dict[str, ParserElement]:
+    """Build the parsers which work on isodates, once per process."""
+    isodate = Regex(r"[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]")
+
+    # handle [ordinals] weekdays + timedeltas
+    timedelta = Group(
+        Optional(oneOf(ordinals))("ordinal")
+        + oneOf(days)("day")
+        + oneOf(["before", "after"])("delta")
+        + isodate("date")
+    )
+    timedelta.setParseAction(_parse_timedelta)
+    _timedeltas = timedelta[...]
+
+    # handle betweens
+    between = Group(
+        Optional(oneOf(ordinals))("ordinal")
+        + oneOf(days)("day")
+        + "between"
+        + isodate("date1")
+        + isodate("date2")
+    )
+    between.setParseAction(_parse_between)
+    _betweens = between[...]
+    _betweens += _timedeltas
+
+    or_expr = Group((isodate("lhs") ^ "False") + "OR" + (isodate("rhs") ^ "False"))
+    or_expr.setParseAction(_parse_or)
+
+    and_expr = Group((isodate("lhs") ^ "False") + "AND" + (isodate("rhs") ^ "False"))
+    and_expr.setParseAction(_parse_and)
+
+    # convert dates to datetime.date() objects
+    value = isodate.copy()
+    value.setParseAction(lambda s, l, t: date.fromisoformat(t[0]))
+
+    return {
+        "deltas": _betweens,
+        "or": or_expr[...],
+        "and": and_expr[...],
+        "isodates": value[...],
+    }
+
+
 def dsl_parser(datestr: str, year: int) -> date:
     """
     Parse dsl str for a given year.
@@ -133,7 +215,6 @@ def dsl_parser(datestr: str, year: int) -> date:
 
     year: int : Year in which to evaluate expression
 
-
     Returns
     -------
     date
@@ -142,50 +223,21 @@ def dsl_parser(datestr: str, year: int) -> date:
 
     # First we convert all possible date representations into isodate strings (yyyy-mm-dd)
 
+    _specials, _yearless = build_year_grammar(year)
+    grammar = build_grammar()
+
     # convert specials
-    special = oneOf(specials.keys())
-    special.setParseAction(lambda t: str(specials[t[0]](year)) + " ")
-    _specials = special[...]
     datestr = _specials.transformString(datestr)
 
     # convert yearless date expressions into dates
-    yearless = Word(nums) + oneOf(months)
-    yearless.setParseAction(
-        lambda t: str(date(year, months.index(t[1]) + 1, int(t[0]))) + " "
-    )
-    _yearless = yearless[...]
     datestr = _yearless.transformString(datestr)
 
     # All dates are now isodates.
-    isodate = Regex(r"[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]")
 
-    # handle [ordinals] weekdays + timedeltas
-    timedelta = Group(
-        Optional(oneOf(ordinals))("ordinal")
-        + oneOf(days)("day")
-        + oneOf(["before", "after"])("delta")
-        + isodate("date")
-    )
-    timedelta.setParseAction(_parse_timedelta)
-    _timedeltas = timedelta[...]
-    # datestr = _timedeltas.transformString(datestr)
-
-    # handle betweens
-
-    between = Group(
-        Optional(oneOf(ordinals))("ordinal")
-        + oneOf(days)("day")
-        + "between"
-        + isodate("date1")
-        + isodate("date2")
-    )
-
-    between.setParseAction(_parse_between)
-    _betweens = between[...]
-    _betweens += _timedeltas
+    # handle [ordinals] weekdays + timedeltas and betweens
     count = 0
     while any(x in datestr for x in ("after", "before", "between")):
-        datestr = _betweens.transformString(datestr)
+        datestr = grammar["deltas"].transformString(datestr)
         if count > 10:
             raise DSLError(f"Recursion limit reached, got as far as {datestr}")
         count += 1
@@ -208,36 +260,58 @@ def dsl_parser(datestr: str, year: int) -> date:
 
     count = 0
     while "OR" in datestr:
-        or_expr = Group((isodate("lhs") ^ "False") + "OR" + (isodate("rhs") ^ "False"))
-        or_expr.setParseAction(_parse_or)
-        _or_expr = or_expr[...]
-        datestr = _or_expr.transformString(datestr)
+        datestr = grammar["or"].transformString(datestr)
         if count > 10:
             raise DSLError(f"Recursion limit reached, got as far as {datestr}")
         count += 1
 
     count = 0
     while "AND" in datestr:
-        and_expr = Group(
-            (isodate("lhs") ^ "False") + "AND" + (isodate("rhs") ^ "False")
-        )
-        and_expr.setParseAction(_parse_and)
-        _and_expr = and_expr[...]
-        datestr = _and_expr.transformString(datestr)
+        datestr = grammar["and"].transformString(datestr)
         if count > 10:
             raise DSLError(f"Recursion limit reached, got as far as {datestr}")
         count += 1
 
     # convert dates to datetime.date() objects
-    isodate.setParseAction(lambda s, l, t: date.fromisoformat(t[0]))
-    _isodates = isodate[...]
-    parsed = _isodates.parseString(datestr)
+    parsed = grammar["isodates"].parseString(datestr)
     try:
         return parsed[0]
     except IndexError:
         raise DSLError("Unable to parse")
 
 
+@lru_cache(maxsize=1 << 16)
+def resolve(datestr: str, year: int) -> date:
+    """
+    Parse dsl str for a given year, remembering the result.
+
+    >>> from app.DSL.dsl_parser import resolve
+    >>> resolve("Sat between 23 Oct 31 Oct", 2021)
+    datetime.date(2021, 10, 23)
+    """
+    return dsl_parser(datestr, year)
+
+
+def warm(datestrs: Iterable[str], years: Iterable[int]) -> int:
+    """
+    Build the grammar and fill the caches for some datestrs and years.
+
+    Returns the number of datestrs which failed to resolve; they are left
+    to fail when they are actually used.
+    """
+    build_grammar()
+    datestrs = list(datestrs)
+    failures = 0
+    for year in years:
+        build_year_grammar(year)
+        for datestr in datestrs:
+            try:
+                resolve(datestr, year)
+            except Exception:
+                failures += 1
+    return failures
+
+
 if __name__ == "__main__":
     import doctest
 
@@ -0,0 +1,99 @@
+"""
+Generate the ordo for several calendars in a single pass.
+
+The calendars we support share almost every anchor date and rule, so we
+resolve each year's specials and every distinct rule once and only
+resolve again where a calendar overrides a rule:
+
+>>> from app.DSL.ordo import gen_ordo
+>>> ordo, stats = gen_ordo(
+...     ["Easter", "1 Jan"], 2020, ["1955", "1960"], {"1960": {"1 Jan": "2 Jan"}}
+... )
+>>> ordo["1955"]
+[datetime.date(2020, 4, 12), datetime.date(2020, 1, 1)]
+>>> ordo["1960"]
+[datetime.date(2020, 4, 12), datetime.date(2020, 1, 2)]
+>>> stats["1960"]["resolved"]
+1
+"""
+
+from datetime import date
+from time import perf_counter
+from typing import Dict, Iterable, List, Tuple
+
+try:
+    from .dsl_parser import resolve
+except ImportError:
+    from dsl_parser import resolve
+
+
+def group_by_date(datestrs: List[str], dates: List[date]) -> Dict[date, List[str]]:
+    """
+    Map each calendar date to the datestrs which fall on it.
+
+    >>> from datetime import date
+    >>> from app.DSL.ordo import group_by_date
+    >>> group_by_date(["Easter", "12 Apr"], [date(2020, 4, 12)] * 2)
+    {datetime.date(2020, 4, 12): ['Easter', '12 Apr']}
+    """
+    mapping: Dict[date, List[str]] = {}
+    for datestr, calendar_date in zip(datestrs, dates):
+        mapping.setdefault(calendar_date, []).append(datestr)
+    return mapping
+
+
+def gen_ordo(
+    datestrs: List[str],
+    year: int,
+    calendars: Iterable[str],
+    overrides: Dict[str, Dict[str, str]] = None,
+) -> Tuple[Dict[str, List[date]], Dict[str, Dict[str, float]]]:
+    """
+    Resolve datestrs for a year in every calendar at once.
+
+    Parameters
+    ----------
+    datestrs: List[str] : Expressions to be resolved.
+
+    year: int : Year in which to evaluate them.
+
+    calendars: Iterable[str] : Calendars to generate.
+
+    overrides: Dict[str, Dict[str, str]] : Per-calendar replacement
+        rules, as `{calendar: {datestr: rule}}`.  (Default value = None)
+
+    Returns
+    -------
+    Tuple[Dict[str, List[date]], Dict[str, Dict[str, float]]]
+        The dates for each calendar, in the same order as `datestrs`,
+        and the throughput for each calendar.  Time spent on shared
+        rules is split evenly between the calendars.
+    """
+    overrides = overrides or {}
+    calendars = list(calendars)
+
+    start = perf_counter()
+    resolved = {i: resolve(i, year) for i in set(datestrs)}
+    shared = (perf_counter() - start) / max(len(calendars), 1)
+
+    ordo, stats = {}, {}
+    for calendar in calendars:
+        start = perf_counter()
+        rules = overrides.get(calendar, {})
+        count = 0
+        dates = []
+        for datestr in datestrs:
+            rule = rules.get(datestr, datestr)
+            if rule not in resolved:
+                resolved[rule] = resolve(rule, year)
+                count += 1
+            dates.append(resolved[rule])
+        ordo[calendar] = dates
+        seconds = shared + perf_counter() - start
+        stats[calendar] = {
+            "entries": len(datestrs),
+            "resolved": count,
+            "seconds": seconds,
+            "per_second": len(datestrs) / seconds if seconds else 0.0,
+        }
+    return ordo, stats
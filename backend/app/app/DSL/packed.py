@@ -0,0 +1,123 @@
+"""
+Pack resolved dates into compact payloads.
+
+Dates travel between workers and the API as day ordinals in an int32
+array behind a small header, base64 encoded so any serialiser can carry
+them and optionally compressed:
+
+>>> from datetime import date
+>>> from app.DSL.packed import pack_dates, unpack_dates
+>>> payload = pack_dates([date(2020, 4, 12), None])
+>>> list(unpack_dates(payload))
+[datetime.date(2020, 4, 12), None]
+
+An unresolved date is stored as ordinal 0, which no date can have.
+"""
+
+import struct
+import sys
+import zlib
+from array import array
+from base64 import b64decode, b64encode
+from collections.abc import Sequence
+from datetime import date
+from typing import Iterable, Iterator, Optional
+
+"""Version of the packed format, part of every header."""
+PACKED_FORMAT = 1
+
+"""Header: format, flags, number of dates."""
+_header = struct.Struct("<BBI")
+_COMPRESSED = 1
+
+"""Payloads of at least this many dates are compressed by default."""
+COMPRESS_MIN_DATES = 256
+
+
+def _to_little_endian(ordinals: array) -> array:
+    if sys.byteorder == "big":
+        ordinals = array("i", ordinals)
+        ordinals.byteswap()
+    return ordinals
+
+
+def pack_ordinals(ordinals: array, compress: bool = None) -> str:
+    """
+    Pack an int32 array of day ordinals.
+
+    Parameters
+    ----------
+    ordinals: array : Ordinals, with 0 for unresolved dates.
+
+    compress: bool : Whether to compress the payload.  (Default value =
+        None, i.e. compress payloads of `COMPRESS_MIN_DATES` or more.)
+
+    Returns
+    -------
+    str
+        The payload.
+    """
+    if compress is None:
+        compress = len(ordinals) >= COMPRESS_MIN_DATES
+    body = _to_little_endian(ordinals).tobytes()
+    if compress:
+        body = zlib.compress(body)
+    header = _header.pack(PACKED_FORMAT, _COMPRESSED if compress else 0, len(ordinals))
+    return b64encode(header + body).decode("ascii")
+
+
+def pack_dates(dates: Iterable[Optional[date]], compress: bool = None) -> str:
+    """Pack dates, which may be None if unresolved.  See `pack_ordinals()`."""
+    return pack_ordinals(
+        array("i", (i.toordinal() if i else 0 for i in dates)), compress
+    )
+
+
+def unpack_ordinals(payload: str) -> memoryview:
+    """
+    Unpack a payload into a read-only view of its ordinals.
+
+    >>> from app.DSL.packed import pack_ordinals, unpack_ordinals
+    >>> unpack_ordinals(pack_ordinals(array("i", [1, 2]), True)).tolist()
+    [1, 2]
+    """
+    data = b64decode(payload)
+    version, flags, count = _header.unpack_from(data)
+    if version != PACKED_FORMAT:
+        raise ValueError(f"Unknown packed format {version}")
+    body = memoryview(data)[_header.size :]
+    if flags & _COMPRESSED:
+        body = memoryview(zlib.decompress(body))
+    if len(body) != count * 4:
+        raise ValueError("Truncated packed dates")
+    if sys.byteorder == "big":
+        ordinals = array("i")
+        ordinals.frombytes(body)
+        ordinals.byteswap()
+        return memoryview(ordinals)
+    return body.cast("i")
+
+
+class PackedDates(Sequence):
+    """Dates in a payload, decoded only as they are read."""
+
+    def __init__(self, payload: str):
+        self.ordinals = unpack_ordinals(payload)
+
+    def __len__(self) -> int:
+        return len(self.ordinals)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        ordinal = self.ordinals[i]
+        return date.fromordinal(ordinal) if ordinal else None
+
+    def __iter__(self) -> Iterator[Optional[date]]:
+        for ordinal in self.ordinals:
+            yield date.fromordinal(ordinal) if ordinal else None
+
+
+def unpack_dates(payload: str) -> PackedDates:
+    """Unpack a payload made by `pack_dates()`."""
+    return PackedDates(payload)
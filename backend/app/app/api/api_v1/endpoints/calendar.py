@@ -0,0 +1,174 @@
+from typing import Any, Dict, List, Optional
+
+from celery.result import AsyncResult
+from fastapi import APIRouter, Depends, HTTPException, Response
+from starlette.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+from app import crud, models, schemas, worker
+from app.api import deps
+from app.api.job_events import job_events
+from app.core.celery_app import celery_app
+from app.core.execution import execution
+from app.DSL import unpack_dates
+
+router = APIRouter()
+
+
+def submit_calendar_job(
+    db: Session, *, job_in: schemas.CalendarJobCreate, owner_id: Optional[int]
+) -> models.CalendarJob:
+    """Record a calendar job and queue it without waiting for the worker."""
+    job = crud.calendar_job.create_with_owner(db, obj_in=job_in, owner_id=owner_id)
+    execution.calendar_job(job.id)
+    return job
+
+
+def get_readable_job(
+    db: Session, *, id: str, current_user: models.User
+) -> models.CalendarJob:
+    """
+    Get a job the user may read.
+
+    Jobs without an owner are started on behalf of whoever asked for an
+    unmaterialised year, so anyone may read them.
+    """
+    job = crud.calendar_job.get(db, id=id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if (
+        job.owner_id is not None
+        and not crud.user.is_superuser(current_user)
+        and (job.owner_id != current_user.id)
+    ):
+        raise HTTPException(status_code=400, detail="Not enough permissions")
+    return job
+
+
+@router.get("/years", response_model=List[schemas.CalendarYear])
+def read_years(
+    db: Session = Depends(deps.get_db),
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Retrieve materialised years and when each was last refreshed.
+    """
+    return crud.calendar_year.get_all(db)
+
+
+@router.post("/jobs", response_model=schemas.CalendarJob, status_code=202)
+def create_job(
+    *,
+    db: Session = Depends(deps.get_db),
+    job_in: schemas.CalendarJobCreate,
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Start materialising a range of years.
+    """
+    return submit_calendar_job(db, job_in=job_in, owner_id=current_user.id)
+
+
+@router.get("/jobs/{id}", response_model=schemas.CalendarJob)
+def read_job(
+    *,
+    db: Session = Depends(deps.get_db),
+    id: str,
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Get the status, progress and result of a job.
+    """
+    job = get_readable_job(db, id=id, current_user=current_user)
+    # polling keeps a job from being reaped
+    crud.calendar_job.touch_polled(db, id=id)
+    db.refresh(job)
+    return job
+
+
+@router.post("/jobs/{id}/revoke", response_model=schemas.CalendarJob)
+def revoke_job(
+    *,
+    db: Session = Depends(deps.get_db),
+    id: str,
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Stop a job which has not yet finished.
+    """
+    job = crud.calendar_job.get(db, id=id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if not crud.user.is_superuser(current_user) and (job.owner_id != current_user.id):
+        raise HTTPException(status_code=400, detail="Not enough permissions")
+    if not crud.calendar_job.revoke(db, id=id):
+        raise HTTPException(status_code=400, detail="Job already finished")
+    execution.revoke_calendar_job(id, job.total or 0)
+    db.refresh(job)
+    return job
+
+
+def watchable_job_id(
+    *,
+    db: Session = Depends(deps.get_db),
+    id: str,
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> str:
+    """Check a job may be watched, off the event loop as it queries."""
+    get_readable_job(db, id=id, current_user=current_user)
+    # don't hold a connection for as long as the client watches
+    db.close()
+    return id
+
+
+@router.get("/jobs/{id}/events")
+async def stream_job_events(id: str = Depends(watchable_job_id)) -> Any:
+    """
+    Stream the progress of a job as server-sent events until it finishes.
+    """
+    return StreamingResponse(
+        job_events.watch(id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _resolution(result: AsyncResult) -> Dict[str, Any]:
+    resolution = {"id": result.id, "status": result.state}
+    if result.state == "SUCCESS":
+        resolution.update(result.result)
+        resolution["dates"] = {
+            k: list(unpack_dates(v)) for k, v in resolution["dates"].items()
+        }
+    return resolution
+
+
+@router.post("/resolve", response_model=schemas.Resolution)
+def create_resolution(
+    *,
+    resolution_in: schemas.ResolutionCreate,
+    response: Response,
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Resolve datestrs for a year in every calendar.
+
+    Identical resolutions are memoised, so a repeat request returns the
+    result at once.  Otherwise the status is 202; poll `/resolve/{id}`.
+    """
+    result = worker.send_resolve_calendars(resolution_in.datestrs, resolution_in.year)
+    if result.state != "SUCCESS":
+        response.status_code = 202
+    return _resolution(result)
+
+
+@router.get("/resolve/{id}", response_model=schemas.Resolution)
+def read_resolution(
+    id: str, current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Get the status of a resolution, and its result once done.
+    """
+    if not id.startswith("ordo-"):
+        raise HTTPException(status_code=404, detail="Resolution not found")
+    return _resolution(celery_app.AsyncResult(id))
@@ -1,13 +1,164 @@
+import hashlib
 import json
-from typing import Any, List, Optional
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from functools import lru_cache
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Type,
+)
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+import orjson
+from fastapi import (
+    APIRouter,
+    Body,
+    Depends,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+)
+from fastapi.encoders import jsonable_encoder
 from fastapi_utils.cbv import cbv
+from pydantic import BaseModel, create_model
 from sqlalchemy.orm import Session
+from starlette.responses import JSONResponse, StreamingResponse
 
-from app import models
+from app import models, schemas
 from app.api import deps
+from app.api.fast_json import ORJSONResponse, orm_data
+from app.core.config import settings
 from app.crud.base import CreateSchemaType, CRUDType, SchemaType, UpdateSchemaType
+from app.crud.filters import FilterError, compile_filters
+from app.db.session import SessionLocal
+
+
+def _columns(item: Any) -> Dict[str, Any]:
+    """Snapshot the column values of an ORM object."""
+    return {c.key: getattr(item, c.key) for c in item.__table__.columns}
+
+
+def partial_schema(schema: Type[BaseModel]) -> Type[BaseModel]:
+    """Copy a schema, making every field optional."""
+    fields = {
+        name: (Optional[field.outer_type_], None)
+        for name, field in schema.__fields__.items()
+    }
+    return create_model(f"{schema.__name__}Patch", __base__=schema, **fields)
+
+
+def batch_schema(schema: Type[BaseModel]) -> Type[BaseModel]:
+    """Make a schema for the outcome of getting an item in a batch."""
+    return create_model(
+        f"{schema.__name__}BatchResult",
+        __base__=schemas.BulkResult,
+        item=(Optional[schema], None),
+    )
+
+
+def check_not_null(item_in: BaseModel, schema: Type[BaseModel]) -> None:
+    """Refuse partial changes which null fields `schema` requires."""
+    for field, value in item_in.dict(exclude_unset=True).items():
+        if value is None and schema.__fields__[field].required:
+            raise HTTPException(status_code=422, detail=f"{field} may not be null")
+
+
+@lru_cache(maxsize=256)
+def sparse_schema(schema: Type[BaseModel], fields: Tuple[str, ...]) -> Type[BaseModel]:
+    """Make a schema with only some of the fields of another."""
+    definitions = {
+        name: (Optional[schema.__fields__[name].outer_type_], None) for name in fields
+    }
+    return create_model(
+        f"{schema.__name__}Fields", __config__=schema.__config__, **definitions
+    )
+
+
+def encode_cursor(id: int) -> str:
+    """Make an opaque pagination cursor pointing after an id."""
+    return urlsafe_b64encode(json.dumps({"id": id}).encode()).decode()
+
+
+def decode_cursor(cursor: Optional[str] = Query(None, alias="after")) -> Optional[int]:
+    if cursor is None:
+        return None
+    try:
+        return int(json.loads(urlsafe_b64decode(cursor.encode()))["id"])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor supplied")
+
+
+def version_tag(items: List[Any], paths: Iterable[str] = ()) -> str:
+    """
+    Make a strong ETag from the versions of some items and what they embed.
+
+    `paths` are dotted relationships of the items included in their
+    representation, which must be versioned too.
+    """
+    versions = []
+    for item in items:
+        versions.append([item.id, item.version])
+        for path in paths:
+            related = item
+            for name in path.split("."):
+                related = getattr(related, name)
+                if related is None:
+                    break
+                versions.append([name, related.id, related.version])
+    digest = hashlib.blake2b(json.dumps(versions).encode(), digest_size=16)
+    return f'"{digest.hexdigest()}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Whether a request's If-None-Match header matches an ETag."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    tags = [i.strip() for i in header.split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+
+def export_lines(
+    schema: Type[BaseModel],
+    crud: CRUDType,
+    *,
+    filters: Optional[List[Dict]] = None,
+    owner_id: Optional[int] = None,
+    fast: bool = False,
+) -> Iterator[str]:
+    """
+    Serialise items as newline delimited JSON, a batch of lines at a time.
+
+    If `fast`, items are serialised without validation; see `orm_data()`.
+    """
+    # the stream outlives the request, and with it the request's session
+    db = SessionLocal()
+    try:
+        lines = []
+        for item in crud.iterate(
+            db,
+            filters=filters,
+            owner_id=owner_id,
+            batch_size=settings.EXPORT_BATCH_SIZE,
+        ):
+            if fast:
+                line = orjson.dumps(orm_data(item, schema)).decode()
+            else:
+                line = schema.from_orm(item).json()
+            lines.append(line + "\n")
+            if len(lines) == settings.EXPORT_BATCH_SIZE:
+                yield "".join(lines)
+                lines = []
+        if lines:
+            yield "".join(lines)
+    finally:
+        db.close()
 
 
 def create_item_crud(
@@ -15,21 +166,71 @@ def create_item_crud(
     item_crud: CRUDType,
     item_create_schema: Optional[CreateSchemaType] = None,
     item_update_schema: Optional[UpdateSchemaType] = None,
+    on_change: Optional[Callable[..., None]] = None,
+    fast_read: bool = False,
 ):
+    """
+    Create a router with CRUD endpoints for a model.
+
+    Lists are paged by offset (`skip`) or, more efficiently, by passing
+    the `X-Next-Cursor` header of one page as `after` to get the next.
+    They may be limited to some `fields`, in which case nothing else is
+    loaded.
+    `/export` streams every item as newline delimited JSON instead, and
+    `/batch` gets a known set of items with one query.
+
+    Items and lists of versioned models have ETags, and if a request's
+    `If-None-Match` matches one the response is 304 Not Modified.
+
+    If `fast_read` is set, reads copy items straight into orjson without
+    validating them through `item_schema`; see `app.api.fast_json`.
+
+    If `on_change` is given it is called after every write with a
+    snapshot of the columns of each affected row: the new row on
+    create, the old and new rows on update and the old row on delete.
+    Bulk writes pass every affected row in one call, old rows first.
+    """
     if not item_create_schema:
         item_create_schema = item_schema
     if not item_update_schema:
         item_update_schema = item_create_schema
+    item_patch_schema = partial_schema(item_update_schema)
+    item_patch_response_schema = partial_schema(item_schema)
+    item_batch_schema = batch_schema(item_schema)
 
     router = APIRouter()
 
-    def filter_dict(filters: Optional[List[str]] = Query(None)):
+    def field_list(
+        fields: Optional[str] = Query(
+            None, description="Comma separated fields to return"
+        )
+    ) -> Optional[Tuple[str, ...]]:
+        if not fields:
+            return None
+        fields = tuple(dict.fromkeys(["id"] + [i.strip() for i in fields.split(",")]))
+        unknown = [i for i in fields if i not in item_schema.__fields__]
+        if unknown:
+            raise HTTPException(
+                status_code=400, detail=f"Unknown fields: {', '.join(unknown)}"
+            )
+        return fields
+
+    def filter_dict(
+        filters: Optional[List[str]] = Query(
+            None, description='JSON filters such as {"language": {"in": ["en", "la"]}}',
+        )
+    ):
         try:
-            return list(map(json.loads, filters))
+            filters = list(map(json.loads, filters))
         except json.JSONDecodeError:
             raise HTTPException(status_code=400, detail="Invalid filter input supplied")
         except TypeError:
-            pass
+            return None
+        try:
+            compile_filters(item_crud.model, item_crud.filter_columns(), filters)
+        except FilterError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return filters
 
     @cbv(router)
     class ItemCBV:
@@ -39,15 +240,24 @@ def create_item_crud(
         @router.get("/", response_model=List[item_schema])
         def read_items(
             self,
+            request: Request,
+            response: Response,
             skip: int = 0,
             limit: int = 100,
             test: List = [2, 4],
             filters: Optional[List] = Depends(filter_dict),
+            after: Optional[int] = Depends(decode_cursor),
+            fields: Optional[Tuple[str, ...]] = Depends(field_list),
         ) -> Any:
             """Retrieve items."""
             if self.current_user.is_superuser:
                 items = item_crud.get_multi(
-                    self.db, skip=skip, limit=limit, filters=filters
+                    self.db,
+                    skip=skip,
+                    limit=limit,
+                    filters=filters,
+                    after=after,
+                    fields=fields,
                 )
             else:
                 items = item_crud.get_multi_by_owner(
@@ -56,17 +266,168 @@ def create_item_crud(
                     skip=skip,
                     limit=limit,
                     filters=filters,
+                    after=after,
+                    fields=fields,
+                )
+            if items and len(items) == limit:
+                response.headers["X-Next-Cursor"] = encode_cursor(items[-1].id)
+            if item_crud.versioned:
+                paths = [
+                    i
+                    for i in item_crud.eager_load
+                    if not fields or i.split(".")[0] in fields
+                ]
+                response.headers["ETag"] = version_tag(items, paths)
+                if etag_matches(request, response.headers["ETag"]):
+                    return Response(status_code=304, headers=dict(response.headers))
+            schema = sparse_schema(item_schema, fields) if fields else item_schema
+            if fast_read:
+                return ORJSONResponse(
+                    [orm_data(i, schema) for i in items],
+                    headers=dict(response.headers),
+                )
+            if fields:
+                return JSONResponse(
+                    jsonable_encoder([schema.from_orm(i) for i in items]),
+                    headers=dict(response.headers),
                 )
             return items
 
+        @router.get("/export", response_class=StreamingResponse)
+        def export_items(self, filters: Optional[List] = Depends(filter_dict),) -> Any:
+            """
+            Stream every item as newline delimited JSON, in id order.
+            """
+            return StreamingResponse(
+                export_lines(
+                    item_schema,
+                    item_crud,
+                    filters=filters,
+                    owner_id=None
+                    if self.current_user.is_superuser
+                    else self.current_user.id,
+                    fast=fast_read,
+                ),
+                media_type="application/x-ndjson",
+            )
+
+        @router.get("/batch", response_model=List[item_batch_schema])
+        def read_batch(self, *, ids: List[int] = Query(...)) -> Any:
+            """
+            Get several items by id with one query.
+
+            Results are in the order asked, with the status of each id.
+            """
+            ids = list(dict.fromkeys(ids))
+            if len(ids) > settings.BULK_MAX_ITEMS:
+                raise HTTPException(status_code=413, detail="Too many items")
+            items = {
+                i.id: i
+                for i in item_crud.get_multi_by_ids(self.db, ids=ids, eager=True)
+            }
+            results = []
+            for id in ids:
+                item = items.get(id)
+                if not item:
+                    results.append({"id": id, "status": "not found"})
+                elif not self.current_user.is_superuser and (
+                    item.owner_id != self.current_user.id
+                ):
+                    results.append({"id": id, "status": "not enough permissions"})
+                else:
+                    if fast_read:
+                        item = orm_data(item, item_schema)
+                    results.append({"id": id, "status": "found", "item": item})
+            if fast_read:
+                return ORJSONResponse([{"item": None, **i} for i in results])
+            return results
+
         @router.post("/", response_model=item_schema)
         def create_item(self, *, item_in: item_create_schema) -> Any:
             """Create new item."""
             item = item_crud.create_with_owner(
                 db=self.db, obj_in=item_in, owner_id=self.current_user.id
             )
+            if on_change:
+                on_change(_columns(item))
             return item
 
+        @router.post("/bulk", response_model=List[item_schema])
+        def create_items(self, *, items_in: List[item_create_schema]) -> Any:
+            """
+            Create several items in one transaction.
+
+            Either every item is created, in the order given, or none is.
+            """
+            if len(items_in) > settings.BULK_MAX_ITEMS:
+                raise HTTPException(status_code=413, detail="Too many items")
+            items = item_crud.create_multi_with_owner(
+                db=self.db, objs_in=items_in, owner_id=self.current_user.id
+            )
+            if on_change and items:
+                on_change(*map(_columns, items))
+            return items
+
+        def check_owners(self, ids: List[int]) -> Tuple[List[int], Dict[int, str]]:
+            """
+            Check permission to change several items with one query.
+
+            Returns the ids which may be changed, and the status of those
+            which may not.
+            """
+            owners = item_crud.get_owners(self.db, ids=ids)
+            allowed, refused = [], {}
+            for id in ids:
+                if id not in owners:
+                    refused[id] = "not found"
+                elif not self.current_user.is_superuser and (
+                    owners[id] != self.current_user.id
+                ):
+                    refused[id] = "not enough permissions"
+                else:
+                    allowed.append(id)
+            return allowed, refused
+
+        def snapshot(self, ids: List[int]) -> List[Dict[str, Any]]:
+            if not on_change or not ids:
+                return []
+            return [_columns(i) for i in item_crud.get_multi_by_ids(self.db, ids=ids)]
+
+        @router.patch("/bulk", response_model=List[schemas.BulkResult])
+        def update_items(
+            self, *, ids: List[int] = Body(...), item_in: item_patch_schema = Body(...)
+        ) -> Any:
+            """
+            Apply the same changes to several items.
+
+            Only the fields given are changed.  Reports the outcome for each id.
+            """
+            check_not_null(item_in, item_update_schema)
+            ids = list(dict.fromkeys(ids))
+            if len(ids) > settings.BULK_MAX_ITEMS:
+                raise HTTPException(status_code=413, detail="Too many items")
+            allowed, refused = self.check_owners(ids)
+            before = self.snapshot(allowed)
+            item_crud.update_multi(self.db, ids=allowed, obj_in=item_in)
+            if before:
+                on_change(*before, *self.snapshot(allowed))
+            return [{"id": i, "status": refused.get(i, "updated")} for i in ids]
+
+        @router.delete("/bulk", response_model=List[schemas.BulkResult])
+        def delete_items(self, *, ids: List[int] = Query(...)) -> Any:
+            """
+            Delete several items, reporting the outcome for each id.
+            """
+            ids = list(dict.fromkeys(ids))
+            if len(ids) > settings.BULK_MAX_ITEMS:
+                raise HTTPException(status_code=413, detail="Too many items")
+            allowed, refused = self.check_owners(ids)
+            before = self.snapshot(allowed)
+            item_crud.remove_multi(self.db, ids=allowed)
+            if before:
+                on_change(*before)
+            return [{"id": i, "status": refused.get(i, "deleted")} for i in ids]
+
         @router.put("/{id}", response_model=item_schema)
         def update_item(self, id: int, item_in: item_update_schema,) -> Any:
             """Update an item."""
@@ -77,11 +438,43 @@ def create_item_crud(
                 item.owner_id != self.current_user.id
             ):
                 raise HTTPException(status_code=400, detail="Not enough permissions")
+            before = _columns(item) if on_change else None
             item = item_crud.update(db=self.db, db_obj=item, obj_in=item_in)
+            if on_change:
+                on_change(before, _columns(item))
+            return item
+
+        @router.patch(
+            "/{id}",
+            response_model=item_patch_response_schema,
+            response_model_exclude_unset=True,
+        )
+        def patch_item(self, id: int, item_in: item_patch_schema) -> Any:
+            """
+            Change only the fields given, without loading the whole item.
+
+            Returns the changed fields and the item's small fields.
+            """
+            check_not_null(item_in, item_update_schema)
+            before = item_crud.get_summary(self.db, id=id) if on_change else None
+            item = item_crud.patch(
+                self.db,
+                id=id,
+                obj_in=item_in,
+                owner_id=None
+                if self.current_user.is_superuser
+                else self.current_user.id,
+            )
+            if not item:
+                if not item_crud.get_owners(self.db, ids=[id]):
+                    raise HTTPException(status_code=404, detail="Item not found")
+                raise HTTPException(status_code=400, detail="Not enough permissions")
+            if on_change:
+                on_change(before, item)
             return item
 
         @router.get("/{id}", response_model=item_schema)
-        def read_item(self, id: int,) -> Any:
+        def read_item(self, request: Request, response: Response, id: int,) -> Any:
             """Get item by ID."""
             item = item_crud.get(db=self.db, id=id)
             if not item:
@@ -90,6 +483,15 @@ def create_item_crud(
                 item.owner_id != self.current_user.id
             ):
                 raise HTTPException(status_code=400, detail="Not enough permissions")
+            if item_crud.versioned:
+                etag = version_tag([item], item_crud.eager_load)
+                if etag_matches(request, etag):
+                    return Response(status_code=304, headers={"ETag": etag})
+                response.headers["ETag"] = etag
+            if fast_read:
+                return ORJSONResponse(
+                    orm_data(item, item_schema), headers=dict(response.headers)
+                )
             return item
 
         @router.delete("/{id}", response_model=item_schema)
@@ -102,7 +504,10 @@ def create_item_crud(
                 item.owner_id != self.current_user.id
             ):
                 raise HTTPException(status_code=400, detail="Not enough permissions")
+            before = _columns(item) if on_change else None
             item = item_crud.remove(db=self.db, id=id)
+            if on_change:
+                on_change(before)
             return item
 
     return router
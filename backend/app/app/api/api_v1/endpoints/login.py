@@ -9,12 +9,9 @@ from app import crud, models, schemas
 from app.api import deps
 from app.core import security
 from app.core.config import settings
+from app.core.execution import execution
 from app.core.security import get_password_hash
-from app.utils import (
-    generate_password_reset_token,
-    send_reset_password_email,
-    verify_password_reset_token,
-)
+from app.utils import generate_password_reset_token, verify_password_reset_token
 
 router = APIRouter()
 
@@ -63,8 +60,9 @@ def recover_password(email: str, db: Session = Depends(deps.get_db)) -> Any:
             detail="The user with this username does not exist in the system.",
         )
     password_reset_token = generate_password_reset_token(email=email)
-    send_reset_password_email(
-        email_to=user.email, email=email, token=password_reset_token
+    execution.submit(
+        "app.worker.send_reset_password_email",
+        kwargs={"user_id": user.id, "token": password_reset_token},
     )
     return {"msg": "Password recovery email sent"}
 
@@ -1,10 +1,18 @@
-from fastapi import Depends
+from typing import Any, Dict
+
+from fastapi import Depends, HTTPException, Path
+from fastapi.encoders import jsonable_encoder
 from sqlalchemy.orm import Session
+from starlette.responses import JSONResponse
 
-from app import crud, models, schemas, worker
+from app import crud, schemas, worker
 from app.api import deps
-from app.core.celery_app import celery_app
+from app.core.config import settings
+from app.core.execution import execution
+from app.models.office_parts import valid_calendars
+from app.schemas.calendar import FIRST_YEAR, LAST_YEAR
 
+from .calendar import submit_calendar_job
 from .item_base import create_item_crud
 
 item_schema = schemas.Martyrology
@@ -12,8 +20,20 @@ item_update_schema = schemas.MartyrologyUpdate
 item_create_schema = schemas.MartyrologyCreate
 item_crud = crud.martyrology
 
+
+def update_calendars(*items: Dict[str, Any]) -> None:
+    """Queue re-resolution of the datestrs touched by a write."""
+    datestrs = sorted({i["datestr"] for i in items if i["datestr"]})
+    execution.submit("app.worker.update_datestrs", args=[datestrs])
+
+
 martyrology_router = create_item_crud(
-    item_schema, item_crud, item_create_schema, item_update_schema
+    item_schema,
+    item_crud,
+    item_create_schema,
+    item_update_schema,
+    on_change=update_calendars,
+    fast_read=True,
 )
 
 
@@ -21,42 +41,42 @@ martyrology_router = create_item_crud(
 def gen_datestrs(
     *,
     db: Session = Depends(deps.get_db),
-    year: int
+    year: int = Path(..., ge=FIRST_YEAR, le=LAST_YEAR),
+    calendar: str = valid_calendars[-1],
     # current_user: models.User = Depends(deps.get_current_active_user),
 ):
-    db_obj = db.query(models.Martyrology).distinct("datestr")
-    # db_obj = list(db_obj)[:100]
-    datestrs = [i.datestr for i in db_obj]
-    # chunks = []
-    # for i in range(len(datestrs) // 100):
-    #     chunks.append(datestrs[i * 100 : i * 100 + 100])
-    # print(chunks)
-    # results = celery_app.send_task("app.worker.resolve_datestrs", args=[chunks, year])
-    # results.get()
-    # calendar_dates = [i.get() for i in results.children[0]]
-    results = celery_app.send_task(
-        "app.worker.linear_resolve_datestrs", args=[[i.datestr for i in db_obj], year]
-    )
-    calendar_dates = results.get()
-    mapping = {}
-    for i, date in enumerate(calendar_dates):
-        try:
-            mapping[date].append(datestrs[i])
-        except KeyError:
-            mapping[date] = [datestrs[i]]
-    return mapping
+    """
+    Get the datestrs falling on each date of a year.
 
-    # return res
+    If the year has not been materialised yet a calendar job is started
+    instead and returned with status 202; poll it at `/calendar/jobs/{id}`.
+    """
+    if calendar not in valid_calendars:
+        raise HTTPException(status_code=404, detail="Calendar not found")
+    if crud.calendar_date.is_materialised(db, calendar=calendar, year=year):
+        return crud.calendar_date.get_mapping(db, calendar=calendar, year=year)
+    job = crud.calendar_job.get_active(db, year=year)
+    if not job:
+        job_in = schemas.CalendarJobCreate(first_year=year)
+        job = submit_calendar_job(db, job_in=job_in, owner_id=None)
+    return JSONResponse(
+        status_code=202,
+        content=jsonable_encoder(schemas.CalendarJob.from_orm(job)),
+        headers={"Location": f"{settings.API_V1_STR}/calendar/jobs/{job.id}"},
+    )
 
 
-ordinals_router = create_item_crud(schemas.Ordinals, crud.ordinals)
+ordinals_router = create_item_crud(schemas.Ordinals, crud.ordinals, fast_read=True)
 
 martyrology_router.include_router(
     ordinals_router, prefix="/ordinals",
 )
 
 old_date_template_router = create_item_crud(
-    schemas.OldDateTemplate, crud.old_date_template, schemas.OldDateTemplateCreate
+    schemas.OldDateTemplate,
+    crud.old_date_template,
+    schemas.OldDateTemplateCreate,
+    fast_read=True,
 )
 
 martyrology_router.include_router(
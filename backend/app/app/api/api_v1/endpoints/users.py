@@ -8,7 +8,8 @@ from sqlalchemy.orm import Session
 from app import crud, models, schemas
 from app.api import deps
 from app.core.config import settings
-from app.utils import send_new_account_email
+from app.core.execution import execution
+from app.utils import generate_password_reset_token
 
 router = APIRouter()
 
@@ -45,8 +46,12 @@ def create_user(
         )
     user = crud.user.create(db, obj_in=user_in)
     if settings.EMAILS_ENABLED and user_in.email:
-        send_new_account_email(
-            email_to=user_in.email, username=user_in.email, password=user_in.password
+        execution.submit(
+            "app.worker.send_new_account_email",
+            kwargs={
+                "user_id": user.id,
+                "token": generate_password_reset_token(email=user.email),
+            },
         )
     return user
 
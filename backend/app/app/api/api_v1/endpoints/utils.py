@@ -1,12 +1,13 @@
-from typing import Any
+from typing import Any, List
 
 from fastapi import APIRouter, Depends
 from pydantic.networks import EmailStr
+from sqlalchemy.orm import Session
 
-from app import models, schemas
+from app import crud, models, schemas
 from app.api import deps
 from app.core.celery_app import celery_app
-from app.utils import send_test_email
+from app.core.execution import execution
 
 router = APIRouter()
 
@@ -31,5 +32,16 @@ def test_email(
     """
     Test emails.
     """
-    send_test_email(email_to=email_to)
+    execution.submit("app.worker.send_test_email", args=[email_to])
     return {"msg": "Test email sent"}
+
+
+@router.get("/task-metrics/", response_model=List[schemas.TaskMetric])
+def read_task_metrics(
+    db: Session = Depends(deps.get_db),
+    current_user: models.User = Depends(deps.get_current_active_superuser),
+) -> Any:
+    """
+    Report queue wait, runtime, retries and result size for each task.
+    """
+    return crud.task_metric.get_all(db)
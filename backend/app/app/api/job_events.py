@@ -0,0 +1,104 @@
+import asyncio
+import json
+from datetime import datetime
+from typing import Any, AsyncGenerator, Dict, Optional, Set
+
+from starlette.concurrency import run_in_threadpool
+
+from app import crud
+from app.core.config import settings
+from app.db.session import SessionLocal
+
+FINISHED = ("SUCCESS", "FAILURE", "REVOKED")
+
+
+def read_progress(id: str) -> Optional[Dict[str, Any]]:
+    """Read the progress workers have recorded for a calendar job."""
+    db = SessionLocal()
+    try:
+        job = crud.calendar_job.get(db, id=id)
+        if not job:
+            return None
+        seconds = 0.0
+        if job.started_at:
+            end = job.finished_at or datetime.utcnow()
+            seconds = (end - job.started_at).total_seconds()
+        progress = {
+            "id": job.id,
+            "status": job.status,
+            "done": job.done,
+            "total": job.total,
+            "resolutions": job.resolved,
+            "per_second": job.resolved / seconds if seconds else 0.0,
+            "errors": job.errors,
+            "error": job.error,
+        }
+        # watchers keep a job from being reaped
+        crud.calendar_job.touch_polled(db, id=id)
+        return progress
+    finally:
+        db.close()
+
+
+def format_event(event: str, data: Dict[str, Any]) -> str:
+    """Format a server-sent event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+class JobEvents:
+    """
+    Broadcast calendar job progress to any number of watchers.
+
+    Each job watched is polled by a single task however many clients are
+    watching it, so watchers cost a queue each rather than a thread or a
+    database connection.
+    """
+
+    def __init__(self) -> None:
+        self.watchers: Dict[str, Set[asyncio.Queue]] = {}
+        self.latest: Dict[str, Dict[str, Any]] = {}
+
+    async def poll(self, id: str) -> None:
+        try:
+            while self.watchers.get(id):
+                progress = await run_in_threadpool(read_progress, id)
+                if progress != self.latest.get(id):
+                    self.latest[id] = progress
+                    for queue in self.watchers[id]:
+                        queue.put_nowait(progress)
+                if not progress or progress["status"] in FINISHED:
+                    break
+                await asyncio.sleep(settings.JOB_EVENTS_POLL_SECONDS)
+        finally:
+            self.latest.pop(id, None)
+            for queue in self.watchers.pop(id, ()):
+                queue.put_nowait(None)
+
+    async def watch(self, id: str) -> AsyncGenerator[str, None]:
+        """Stream progress events for a job until it finishes."""
+        queue: asyncio.Queue = asyncio.Queue()
+        if id in self.latest:
+            queue.put_nowait(self.latest[id])
+        if id not in self.watchers:
+            self.watchers[id] = {queue}
+            asyncio.ensure_future(self.poll(id))
+        else:
+            self.watchers[id].add(queue)
+        try:
+            while True:
+                try:
+                    progress = await asyncio.wait_for(
+                        queue.get(), settings.JOB_EVENTS_KEEPALIVE_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if progress is None:
+                    break
+                yield format_event("progress", progress)
+            yield format_event("end", {"id": id})
+        finally:
+            self.watchers.get(id, set()).discard(queue)
+
+
+job_events = JobEvents()
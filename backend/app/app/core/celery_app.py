@@ -1,12 +1,70 @@
+from datetime import timedelta
+
 from celery import Celery
+from kombu import Queue
+
+from app.core.config import settings
 
+# Results live in Postgres: unlike the AMQP backend it supports chords
 celery_app = Celery(
-    "worker", broker="amqp://guest@queue//", backend="amqp://guest@queue//"
+    "worker",
+    broker=settings.CELERY_BROKER_URL,
+    backend=f"db+{settings.SQLALCHEMY_DATABASE_URI}",
+)
+
+# Hand out one task at a time so chunks spread across every process
+celery_app.conf.worker_prefetch_multiplier = 1
+# Memoised resolutions are looked up by task id, so record running tasks
+# and expire results after a while
+celery_app.conf.task_track_started = True
+celery_app.conf.result_expires = timedelta(hours=settings.RESOLUTION_CACHE_HOURS)
+# worker processes warm their caches on startup, see app.worker
+celery_app.conf.worker_proc_alive_timeout = 60
+
+# Interactive work has its own queue (and workers), so bulk jobs cannot
+# starve it.  Within a queue, higher priorities are taken first.
+INTERACTIVE_QUEUE = "interactive-queue"
+BULK_QUEUE = "bulk-queue"
+
+celery_app.conf.task_queues = (
+    Queue(INTERACTIVE_QUEUE, queue_arguments={"x-max-priority": 10}),
+    Queue(BULK_QUEUE, queue_arguments={"x-max-priority": 10}),
 )
+celery_app.conf.task_default_queue = INTERACTIVE_QUEUE
+celery_app.conf.task_default_priority = 5
+
+interactive = {"queue": INTERACTIVE_QUEUE, "priority": 9}
+bulk = {"queue": BULK_QUEUE, "priority": 5}
+background = {"queue": BULK_QUEUE, "priority": 1}
 
 celery_app.conf.task_routes = {
-    "app.worker.test_celery": "main-queue",
-    "app.worker.resolve_datestrs": "main-queue",
-    "app.worker.resolve_datestr": "main-queue",
-    "app.worker.linear_resolve_datestrs": "main-queue",
+    "app.worker.test_celery": interactive,
+    "app.worker.send_test_email": interactive,
+    "app.worker.send_reset_password_email": interactive,
+    "app.worker.send_new_account_email": interactive,
+    "app.worker.resolve_datestr": interactive,
+    "app.worker.linear_resolve_datestrs": interactive,
+    "app.worker.resolve_calendars": interactive,
+    "app.worker.update_datestrs": interactive,
+    "app.worker.calendar_job": interactive,
+    # calendar_job routes its blocks by the size of the job
+    "app.worker.resolve_block": bulk,
+    "app.worker.merge_blocks": bulk,
+    "app.worker.materialise_year": background,
+    "app.worker.refresh_horizon": background,
+    "app.worker.reap_calendar_jobs": interactive,
 }
+
+celery_app.conf.beat_schedule = {
+    "refresh-calendar-horizon": {
+        "task": "app.worker.refresh_horizon",
+        "schedule": timedelta(minutes=settings.CALENDAR_REFRESH_MINUTES),
+    },
+    "reap-calendar-jobs": {
+        "task": "app.worker.reap_calendar_jobs",
+        "schedule": timedelta(minutes=settings.CALENDAR_REAP_MINUTES),
+    },
+}
+
+# Record queue wait, runtime and result size for every task
+from app.core import task_metrics  # noqa: E402,F401
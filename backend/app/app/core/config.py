@@ -51,6 +51,20 @@ class Settings(BaseSettings):
             path=f"/{values.get('POSTGRES_DB') or ''}",
         )
 
+    # Without a broker, calendar work runs in a local process pool of
+    # LOCAL_WORKERS processes (by default one per core) instead of Celery
+    CELERY_BROKER_URL: Optional[str] = None
+    EXECUTION_BACKEND: Optional[str] = None
+    LOCAL_WORKERS: Optional[int] = None
+
+    @validator("EXECUTION_BACKEND", pre=True, always=True)
+    def choose_execution_backend(cls, v: Optional[str], values: Dict[str, Any]) -> str:
+        if not v:
+            return "celery" if values.get("CELERY_BROKER_URL") else "local"
+        if v not in ("celery", "local"):
+            raise ValueError(v)
+        return v
+
     SMTP_TLS: bool = True
     SMTP_PORT: Optional[int] = None
     SMTP_HOST: Optional[str] = None
@@ -77,6 +91,49 @@ class Settings(BaseSettings):
             and values.get("EMAILS_FROM_EMAIL")
         )
 
+    # Datestrs (and years, for calendar jobs) per task when resolution is
+    # spread across workers
+    RESOLVE_CHUNK_SIZE: int = 50
+    CALENDAR_SHARD_YEARS: int = 10
+    # Calendar jobs spanning at most this many years run as interactive work
+    INTERACTIVE_MAX_YEARS: int = 1
+    # Most years a single calendar job may span
+    CALENDAR_JOB_MAX_YEARS: int = 100
+
+    # Most items a single bulk CRUD request may touch
+    BULK_MAX_ITEMS: int = 1000
+
+    # Rows fetched from the cursor, and written, at a time by exports
+    EXPORT_BATCH_SIZE: int = 1000
+
+    # How long memoised resolutions stay in the result store
+    RESOLUTION_CACHE_HOURS: int = 24
+
+    # Years after the current one to keep materialised, and how often
+    # (and after how long) to refresh them
+    CALENDAR_HORIZON_YEARS: int = 5
+    CALENDAR_REFRESH_MINUTES: int = 60
+    CALENDAR_MAX_AGE_HOURS: int = 24
+
+    # How often job progress streams poll for progress, and send keepalives
+    JOB_EVENTS_POLL_SECONDS: float = 1.0
+    JOB_EVENTS_KEEPALIVE_SECONDS: float = 15.0
+
+    # Soft and hard time limits, in seconds, for resolving datestrs and for
+    # resolving and rendering whole blocks or years
+    RESOLVE_SOFT_TIME_LIMIT: int = 60
+    RESOLVE_TIME_LIMIT: int = 90
+    BLOCK_SOFT_TIME_LIMIT: int = 600
+    BLOCK_TIME_LIMIT: int = 660
+
+    # Unfinished calendar jobs nobody has polled for this long are revoked,
+    # checked this often
+    CALENDAR_JOB_ABANDON_MINUTES: int = 15
+    CALENDAR_REAP_MINUTES: int = 5
+
+    # How often each worker process adds its task metrics to the database
+    TASK_METRICS_FLUSH_SECONDS: float = 10.0
+
     EMAIL_TEST_USER: EmailStr = "test@example.com"  # type: ignore
     FIRST_SUPERUSER: EmailStr
     FIRST_SUPERUSER_PASSWORD: str
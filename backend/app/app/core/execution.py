@@ -0,0 +1,191 @@
+"""
+Run calendar work on Celery or, without a broker, a local process pool.
+
+Both backends store results in the Celery result backend, so callers look
+results up with `celery_app.AsyncResult()` whichever is in use.
+"""
+import logging
+import sys
+from concurrent.futures import (
+    CancelledError,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+from time import sleep
+from typing import Any, Dict, List, Optional
+from uuid import uuid4
+
+from celery.result import AsyncResult
+from celery.utils.time import get_exponential_backoff_interval
+
+from app.core.celery_app import celery_app
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class CeleryExecution:
+    """Send work to Celery workers through the broker."""
+
+    def submit(
+        self,
+        name: str,
+        args: Optional[List[Any]] = None,
+        kwargs: Optional[Dict[str, Any]] = None,
+        task_id: Optional[str] = None,
+    ) -> AsyncResult:
+        """
+        Run a task by name.
+
+        Tasks which replace themselves (e.g. `calendar_job`) have their own
+        method, since only Celery can run them directly.
+        """
+        return celery_app.send_task(name, args=args, kwargs=kwargs, task_id=task_id)
+
+    def calendar_job(self, job_id: str) -> None:
+        """Run a calendar job, sharded across workers."""
+        self.submit("app.worker.calendar_job", args=[job_id], task_id=job_id)
+
+    def revoke_calendar_job(self, job_id: str, total: int) -> None:
+        """
+        Stop the tasks of a calendar job with `total` blocks.
+
+        The job should already be marked revoked, so that blocks which are
+        not stopped here skip their work.  Running blocks are interrupted
+        as if they had hit their soft time limit.
+        """
+        from app.worker import block_task_id
+
+        ids = [job_id] + [block_task_id(job_id, i) for i in range(total)]
+        celery_app.control.revoke(ids, terminate=True, signal="SIGUSR1")
+
+
+def run_task(
+    name: str, args: List[Any], kwargs: Dict[str, Any], task_id: Optional[str]
+) -> Any:
+    """
+    Run a task in this process, storing its state like a Celery worker.
+
+    Errors in the task's `autoretry_for` are retried as a worker would,
+    with the task's `max_retries` and backoff, sleeping in this process.
+    """
+    from app import worker  # noqa: F401 (registers the tasks)
+
+    backend = celery_app.backend
+    task = celery_app.tasks[name]
+    retry_for = tuple(getattr(task, "autoretry_for", ()))
+    max_retries = getattr(task, "retry_kwargs", {}).get("max_retries", task.max_retries)
+    if task_id:
+        backend.store_result(task_id, None, "STARTED")
+    retries = 0
+    while True:
+        try:
+            result = task(*args, **kwargs)
+            break
+        except retry_for:
+            if max_retries is not None and retries >= max_retries:
+                if task_id:
+                    backend.mark_as_failure(task_id, sys.exc_info()[1])
+                raise
+            countdown = task.default_retry_delay
+            if task.retry_backoff:
+                countdown = get_exponential_backoff_interval(
+                    factor=int(task.retry_backoff),
+                    retries=retries,
+                    maximum=task.retry_backoff_max,
+                    full_jitter=task.retry_jitter,
+                )
+            logger.warning(f"Retrying {name} in {countdown}s")
+            retries += 1
+            sleep(countdown)
+        except Exception as e:
+            if task_id:
+                backend.mark_as_failure(task_id, e)
+            raise
+    if task_id:
+        backend.store_result(task_id, result, "SUCCESS")
+    return result
+
+
+def init_process() -> None:
+    from app import worker
+
+    worker.warm_worker_process()
+
+
+class LocalExecution(CeleryExecution):
+    """
+    Run work in a pool of local processes, for installs without a broker.
+
+    The pool is started on first use.  Calendar jobs are coordinated from a
+    thread in this process, so the caller never waits on them.
+    """
+
+    def __init__(self, workers: Optional[int] = None):
+        self.workers = workers
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._coordinator = ThreadPoolExecutor(1)
+        self._jobs: Dict[str, List[Future]] = {}
+
+    @property
+    def pool(self) -> ProcessPoolExecutor:
+        if not self._pool:
+            self._pool = ProcessPoolExecutor(self.workers, initializer=init_process)
+        return self._pool
+
+    def _submit(
+        self,
+        name: str,
+        args: Optional[List[Any]] = None,
+        kwargs: Optional[Dict[str, Any]] = None,
+        task_id: Optional[str] = None,
+    ) -> Future:
+        return self.pool.submit(run_task, name, args or [], kwargs or {}, task_id)
+
+    def submit(
+        self,
+        name: str,
+        args: Optional[List[Any]] = None,
+        kwargs: Optional[Dict[str, Any]] = None,
+        task_id: Optional[str] = None,
+    ) -> AsyncResult:
+        task_id = task_id or uuid4().hex
+        self._submit(name, args, kwargs, task_id)
+        return celery_app.AsyncResult(task_id)
+
+    def _calendar_job(self, job_id: str) -> None:
+        from app import worker
+
+        try:
+            blocks, _ = worker.plan_calendar_job(job_id)
+            if not blocks:
+                return
+            # resolve_block records its own failure on the job
+            futures = [
+                self._submit("app.worker.resolve_block", args=[job_id, i, j])
+                for i, j in blocks
+            ]
+            self._jobs[job_id] = futures
+            results = [i.result() for i in futures]
+            self._submit("app.worker.merge_blocks", args=[results, job_id]).result()
+        except CancelledError:
+            logger.info(f"Calendar job {job_id} revoked")
+        except Exception:
+            logger.exception(f"Calendar job {job_id} failed")
+        finally:
+            self._jobs.pop(job_id, None)
+
+    def calendar_job(self, job_id: str) -> None:
+        self._coordinator.submit(self._calendar_job, job_id)
+
+    def revoke_calendar_job(self, job_id: str, total: int) -> None:
+        """Cancel the blocks of a job which have not started."""
+        for future in self._jobs.get(job_id, []):
+            future.cancel()
+
+
+if settings.EXECUTION_BACKEND == "local":
+    execution: CeleryExecution = LocalExecution(settings.LOCAL_WORKERS)
+else:
+    execution = CeleryExecution()
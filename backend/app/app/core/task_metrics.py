@@ -0,0 +1,119 @@
+"""
+Measure Celery tasks from signals.
+
+Publishers stamp each message with the time it was sent, so workers can
+tell how long it waited in the broker.  Each worker process totals the
+wait, runtime, retries, failures and serialised result size of each task
+name, and adds them to the `taskmetric` table every
+`TASK_METRICS_FLUSH_SECONDS`, where the API can aggregate them across
+every worker.  Wait times assume the hosts' clocks agree.
+"""
+import logging
+from time import time
+from typing import Any, Dict
+
+from celery.signals import (
+    before_task_publish,
+    task_postrun,
+    task_prerun,
+    task_retry,
+    worker_process_shutdown,
+)
+from kombu.serialization import dumps
+
+from app import crud
+from app.core.config import settings
+from app.db.session import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+_started: Dict[str, float] = {}
+_pending: Dict[str, Dict[str, float]] = {}
+_flushed = time()
+
+
+def _add(name: str, **values: float) -> Dict[str, float]:
+    metrics = _pending.setdefault(name, {})
+    for k, v in values.items():
+        if k.endswith("_max"):
+            metrics[k] = max(metrics.get(k, 0), v)
+        else:
+            metrics[k] = metrics.get(k, 0) + v
+    return metrics
+
+
+def flush() -> None:
+    """Add this process's metrics to the database."""
+    global _flushed
+    _flushed = time()
+    if not _pending:
+        return
+    metrics = dict(_pending)
+    _pending.clear()
+    db = SessionLocal()
+    try:
+        crud.task_metric.record(db, metrics=metrics)
+    except Exception:
+        logger.exception("Unable to record task metrics")
+    finally:
+        db.close()
+
+
+def result_size(retval: Any, serializer: str) -> int:
+    """Measure a result as the result backend stores it."""
+    try:
+        return len(dumps(retval, serializer=serializer)[2])
+    except Exception:
+        return 0
+
+
+@before_task_publish.connect
+def stamp_published(headers: Dict[str, Any] = None, **kwargs: Any) -> None:
+    if headers is not None:
+        headers["published_at"] = time()
+
+
+@task_prerun.connect
+def start_timer(task_id: str = None, task: Any = None, **kwargs: Any) -> None:
+    now = time()
+    _started[task_id] = now
+    published = getattr(task.request, "published_at", None)
+    if published:
+        wait = max(now - published, 0.0)
+        _add(task.name, waited=1, wait_seconds=wait, wait_max=wait)
+
+
+@task_postrun.connect
+def stop_timer(
+    task_id: str = None,
+    task: Any = None,
+    retval: Any = None,
+    state: str = None,
+    **kwargs: Any,
+) -> None:
+    started = _started.pop(task_id, None)
+    runtime = time() - started if started else 0.0
+    size = 0
+    if state == "SUCCESS":
+        size = result_size(retval, task.app.conf.result_serializer)
+    _add(
+        task.name,
+        count=1,
+        failures=int(state == "FAILURE"),
+        runtime_seconds=runtime,
+        runtime_max=runtime,
+        result_bytes=size,
+        result_bytes_max=size,
+    )
+    if time() - _flushed >= settings.TASK_METRICS_FLUSH_SECONDS:
+        flush()
+
+
+@task_retry.connect
+def count_retry(sender: Any = None, **kwargs: Any) -> None:
+    _add(sender.name, retries=1)
+
+
+@worker_process_shutdown.connect
+def flush_on_shutdown(**kwargs: Any) -> None:
+    flush()
@@ -1,6 +1,13 @@
+from .crud_calendar import (
+    calendar_date,
+    calendar_job,
+    calendar_year,
+    rendered_old_date,
+)
 from .crud_item import item
 from .crud_martyrology import martyrology, old_date_template, ordinals
 from .crud_office import block
+from .crud_task_metric import task_metric
 from .crud_user import user
 
 # For a new basic set of CRUD operations you could just do
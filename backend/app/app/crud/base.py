@@ -1,10 +1,22 @@
-from collections import ChainMap
-from typing import Any, Dict, Generic, List, Optional, Type, TypeVar, Union
+from typing import (
+    Any,
+    Dict,
+    Generic,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Type,
+    TypeVar,
+    Union,
+)
 
 from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
+from sqlalchemy import Column, inspect, select
+from sqlalchemy.orm import Query, Session, joinedload, load_only
 
+from app.crud.filters import compile_filters, indexed_columns
 from app.db.base_class import Base
 
 ModelType = TypeVar("ModelType", bound=Base)
@@ -14,6 +26,13 @@ SchemaType = TypeVar("SchemaType", bound=BaseModel)
 
 
 class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
+    # Columns too large to load unless they are needed
+    large_columns: Tuple[str, ...] = ()
+    # Columns lists may be filtered on (default: those leading an index)
+    filterable: Optional[Tuple[str, ...]] = None
+    # Dotted paths of relationships to load with batches and lists, e.g. "a.b"
+    eager_load: Tuple[str, ...] = ()
+
     def __init__(self, model: Type[ModelType]):
         """
         CRUD object with default methods to Create, Read, Update, Delete (CRUD).
@@ -25,9 +44,132 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         """
         self.model = model
 
+    @property
+    def versioned(self) -> bool:
+        """Whether the model has a `version` bumped by every update."""
+        return "version" in self.model.__table__.columns
+
+    def bump_version(self, values: Dict[Any, Any]) -> Dict[Any, Any]:
+        """Add incrementing the version to the values of an UPDATE."""
+        if self.versioned:
+            values["version"] = self.model.__table__.c.version + 1
+        return values
+
+    def update_values(self, update_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Keep the values of an UPDATE which may be set by the client.
+
+        Those not naming a column are dropped, as are the primary key and
+        version, which are never changed by updates.
+        """
+        table = self.model.__table__
+        fixed = {i.key for i in table.primary_key.columns} | {"version"}
+        return {
+            k: v
+            for k, v in jsonable_encoder(update_data).items()
+            if k in table.columns and k not in fixed
+        }
+
     def get(self, db: Session, id: Any) -> Optional[ModelType]:
         return db.query(self.model).filter(self.model.id == id).first()
 
+    def summary_columns(self) -> List[Column]:
+        """Get the columns of the table which are not `large_columns`."""
+        return [
+            i for i in self.model.__table__.columns if i.key not in self.large_columns
+        ]
+
+    def get_summary(self, db: Session, *, id: Any) -> Optional[Dict[str, Any]]:
+        """Get the values of the `summary_columns()` of a row."""
+        query = select(self.summary_columns()).where(self.model.id == id)
+        row = db.execute(query).first()
+        return dict(row) if row else None
+
+    def eager_options(self) -> List[Any]:
+        """Get query options joining in the `eager_load` relationships."""
+        options = []
+        for path in self.eager_load:
+            model, option = self.model, None
+            for name in path.split("."):
+                attr = getattr(model, name)
+                option = joinedload(attr) if option is None else option.joinedload(attr)
+                model = attr.property.mapper.class_
+            options.append(option)
+        return options
+
+    def get_multi_by_ids(
+        self, db: Session, *, ids: List[int], eager: bool = False
+    ) -> List[ModelType]:
+        """
+        Get the objects with some ids, in no particular order.
+
+        If `eager`, the `eager_load` relationships are loaded by the same
+        query.
+        """
+        query = db.query(self.model).filter(self.model.id.in_(ids))
+        if eager:
+            query = query.options(*self.eager_options())
+        return query.all()
+
+    def filter_columns(self) -> List[str]:
+        """Get the columns lists may be filtered on."""
+        if self.filterable is not None:
+            return list(self.filterable)
+        return indexed_columns(self.model)
+
+    def only(self, query: Query, fields: List[str]) -> Query:
+        """
+        Load only some fields of the model, and its id.
+
+        Other columns are deferred, and relationships named are loaded in
+        the same query.
+        """
+        mapper = inspect(self.model)
+        columns = [i for i in fields if i in mapper.columns]
+        if self.versioned:
+            columns.append("version")
+        relationships = [i for i in fields if i in mapper.relationships]
+        return query.options(
+            load_only("id", *columns),
+            *(joinedload(getattr(self.model, i)) for i in relationships),
+        )
+
+    def page(
+        self,
+        query: Query,
+        *,
+        skip: int = 0,
+        limit: int = 100,
+        filters: Optional[List[Dict]] = None,
+        after: Optional[int] = None,
+        fields: Optional[List[str]] = None,
+    ) -> List[ModelType]:
+        """
+        Get a page of a query in id order.
+
+        Pages are found by offset from `skip`, or, if `after` is given, by
+        seeking past that id in the primary key index, which costs the same
+        however deep the page and is unaffected by concurrent inserts.
+
+        `filters` are compiled by `compile_filters()`, and may only use the
+        `filter_columns()`.  If `fields` are given, only they are loaded; see
+        `only()`; otherwise the `eager_load` relationships are loaded too.
+        """
+        if filters:
+            query = query.filter(
+                *compile_filters(self.model, self.filter_columns(), filters)
+            )
+        if fields:
+            query = self.only(query, fields)
+        else:
+            query = query.options(*self.eager_options())
+        query = query.order_by(self.model.id)
+        if after is not None:
+            query = query.filter(self.model.id > after)
+        else:
+            query = query.offset(skip)
+        return query.limit(limit).all()
+
     def get_multi(
         self,
         db: Session,
@@ -35,18 +177,41 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         skip: int = 0,
         limit: int = 100,
         filters: Optional[List[Dict]] = None,
+        after: Optional[int] = None,
+        fields: Optional[List[str]] = None,
     ) -> List[ModelType]:
-        if not filters:
-            return db.query(self.model).offset(skip).limit(limit).all()
-        else:
-            filters = ChainMap(*filters)
-            return (
-                db.query(self.model)
-                .filter_by(**filters)
-                .offset(skip)
-                .limit(limit)
-                .all()
+        return self.page(
+            db.query(self.model),
+            skip=skip,
+            limit=limit,
+            filters=filters,
+            after=after,
+            fields=fields,
+        )
+
+    def iterate(
+        self,
+        db: Session,
+        *,
+        filters: Optional[List[Dict]] = None,
+        owner_id: Optional[int] = None,
+        batch_size: int = 1000,
+    ) -> Iterator[ModelType]:
+        """
+        Iterate over every object, or every one some user owns, in id order.
+
+        Rows come from a server-side cursor `batch_size` at a time, so memory
+        use does not grow with the table.
+        """
+        query = db.query(self.model)
+        if owner_id is not None:
+            query = query.filter(self.model.owner_id == owner_id)
+        if filters:
+            query = query.filter(
+                *compile_filters(self.model, self.filter_columns(), filters)
             )
+        query = query.order_by(self.model.id)
+        return iter(query.execution_options(stream_results=True).yield_per(batch_size))
 
     def create(self, db: Session, *, obj_in: CreateSchemaType) -> ModelType:
         obj_in_data = jsonable_encoder(obj_in)
@@ -56,6 +221,26 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         db.refresh(db_obj)
         return db_obj
 
+    def create_multi(
+        self, db: Session, *, objs_in: List[CreateSchemaType], **values: Any
+    ) -> List[ModelType]:
+        """
+        Create several objects in one transaction.
+
+        The rows go in a single multi-row INSERT ... RETURNING, and are then
+        loaded with one query.  `values` are set on every row.
+        """
+        if not objs_in:
+            return []
+        rows = [dict(jsonable_encoder(i), **values) for i in objs_in]
+        table = self.model.__table__
+        ids = [
+            i for (i,) in db.execute(table.insert().values(rows).returning(table.c.id))
+        ]
+        db.commit()
+        objs = {i.id: i for i in db.query(self.model).filter(self.model.id.in_(ids))}
+        return [objs[i] for i in ids]
+
     def update(
         self,
         db: Session,
@@ -71,11 +256,99 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         for field in obj_data:
             if field in update_data:
                 setattr(db_obj, field, update_data[field])
+        if self.versioned:
+            # incremented by the UPDATE itself, so concurrent updates both count
+            db_obj.version = self.model.version + 1
         db.add(db_obj)
         db.commit()
         db.refresh(db_obj)
         return db_obj
 
+    def patch(
+        self,
+        db: Session,
+        *,
+        id: Any,
+        obj_in: Union[UpdateSchemaType, Dict[str, Any]],
+        owner_id: Optional[int] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Change only the fields set in `obj_in` with one UPDATE ... RETURNING.
+
+        Nothing else is loaded or serialised, so the cost doesn't depend on
+        the size of the row.  If `owner_id` is given, only a row it owns is
+        changed.  The version, if any, is bumped by the same statement.
+
+        Returns
+        -------
+        Optional[Dict[str, Any]]
+            The `summary_columns()` and the changed columns of the row, or
+            None if there is no such row.
+        """
+        if isinstance(obj_in, dict):
+            update_data = obj_in
+        else:
+            update_data = obj_in.dict(exclude_unset=True)
+        table = self.model.__table__
+        values = self.update_values(update_data)
+        returning = self.summary_columns()
+        returning += [table.c[i] for i in values if i in self.large_columns]
+        where = table.c.id == id
+        if owner_id is not None:
+            where &= table.c.owner_id == owner_id
+        if values:
+            query = (
+                table.update()
+                .where(where)
+                .values(self.bump_version(values))
+                .returning(*returning)
+            )
+        else:
+            query = select(returning).where(where)
+        row = db.execute(query).first()
+        db.commit()
+        return dict(row) if row else None
+
+    def update_multi(
+        self,
+        db: Session,
+        *,
+        ids: List[int],
+        obj_in: Union[UpdateSchemaType, Dict[str, Any]],
+    ) -> int:
+        """
+        Apply the same changes to several objects with one UPDATE.
+
+        Only the fields set in `obj_in` are changed.  Returns the number of
+        rows updated.
+        """
+        if isinstance(obj_in, dict):
+            update_data = obj_in
+        else:
+            update_data = obj_in.dict(exclude_unset=True)
+        values = self.update_values(update_data)
+        if not ids or not values:
+            return 0
+        count = (
+            db.query(self.model)
+            .filter(self.model.id.in_(ids))
+            .update(self.bump_version(values), synchronize_session=False)
+        )
+        db.commit()
+        return count
+
+    def remove_multi(self, db: Session, *, ids: List[int]) -> int:
+        """Delete several objects with one DELETE, returning how many."""
+        if not ids:
+            return 0
+        count = (
+            db.query(self.model)
+            .filter(self.model.id.in_(ids))
+            .delete(synchronize_session=False)
+        )
+        db.commit()
+        return count
+
     def remove(self, db: Session, *, id: int) -> ModelType:
         obj = db.query(self.model).get(id)
         db.delete(obj)
@@ -97,6 +370,16 @@ class CRUDWithOwnerBase(CRUDBase[ModelType, CreateSchemaType, UpdateSchemaType])
         db.refresh(db_obj)
         return db_obj
 
+    def get_owners(self, db: Session, *, ids: List[int]) -> Dict[int, Optional[int]]:
+        """Get the owner of each of some ids which exist."""
+        query = db.query(self.model.id, self.model.owner_id)
+        return dict(query.filter(self.model.id.in_(ids)))
+
+    def create_multi_with_owner(
+        self, db: Session, *, objs_in: List[CreateSchemaType], owner_id: int
+    ) -> List[ModelType]:
+        return self.create_multi(db, objs_in=objs_in, owner_id=owner_id)
+
     def get_multi_by_owner(
         self,
         db: Session,
@@ -105,22 +388,14 @@ class CRUDWithOwnerBase(CRUDBase[ModelType, CreateSchemaType, UpdateSchemaType])
         skip: int = 0,
         limit: int = 100,
         filters: Optional[List[Dict]] = None,
+        after: Optional[int] = None,
+        fields: Optional[List[str]] = None,
     ) -> List[ModelType]:
-        if not filters:
-            return (
-                db.query(self.model)
-                .filter(self.model.owner_id == owner_id)
-                .offset(skip)
-                .limit(limit)
-                .all()
-            )
-        else:
-            filters = ChainMap(*filters)
-            return (
-                db.query(self.model)
-                .filter(self.model.owner_id == owner_id)
-                .filter_by(**filters)
-                .offset(skip)
-                .limit(limit)
-                .all()
-            )
+        return self.page(
+            db.query(self.model).filter(self.model.owner_id == owner_id),
+            skip=skip,
+            limit=limit,
+            filters=filters,
+            after=after,
+            fields=fields,
+        )
@@ -0,0 +1,310 @@
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional
+from uuid import uuid4
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.crud.base import CRUDBase
+from app.DSL import group_by_date
+from app.models.calendar import (
+    CalendarDate,
+    CalendarJob,
+    CalendarYear,
+    RenderedOldDate,
+)
+from app.schemas import calendar as schemas
+from app.schemas.calendar import CalendarDateCreate, CalendarDateUpdate
+
+
+class CRUDCalendarDate(CRUDBase[CalendarDate, CalendarDateCreate, CalendarDateUpdate]):
+    def get_years(self, db: Session, *, calendar: str) -> List[int]:
+        """Get the years materialised for a calendar."""
+        query = db.query(self.model.year).filter(self.model.calendar == calendar)
+        return sorted(i for (i,) in query.distinct())
+
+    def is_materialised(self, db: Session, *, calendar: str, year: int) -> bool:
+        query = db.query(self.model.id).filter(
+            self.model.calendar == calendar, self.model.year == year
+        )
+        return db.query(query.exists()).scalar()
+
+    def get_mapping(
+        self, db: Session, *, calendar: str, year: int
+    ) -> Dict[date, List[str]]:
+        rows = (
+            db.query(self.model.datestr, self.model.calendar_date)
+            .filter(self.model.calendar == calendar, self.model.year == year)
+            .order_by(self.model.calendar_date, self.model.id)
+            .all()
+        )
+        return group_by_date([i for i, _ in rows], [i for _, i in rows])
+
+    def lock_year(self, db: Session, *, year: int) -> None:
+        """
+        Lock a year of every calendar until the transaction ends.
+
+        Rows are replaced by deleting and reinserting them, so writers of the
+        same year must take turns or they could each insert the same rows.
+        Take the locks of several years in order.
+        """
+        key = func.hashtext(self.model.__tablename__)
+        db.execute(select([func.pg_advisory_xact_lock(key, year)]))
+
+    def replace_datestrs(
+        self,
+        db: Session,
+        *,
+        calendar: str,
+        year: int,
+        datestrs: List[str],
+        resolved: Dict[str, date],
+        commit: bool = True,
+    ) -> None:
+        """
+        Replace the stored resolutions of some datestrs in one year.
+
+        Datestrs missing from `resolved` are dropped.
+        """
+        self.lock_year(db, year=year)
+        db.query(self.model).filter(
+            self.model.calendar == calendar,
+            self.model.year == year,
+            self.model.datestr.in_(datestrs),
+        ).delete(synchronize_session=False)
+        db.bulk_insert_mappings(
+            self.model,
+            [
+                dict(
+                    calendar=calendar, year=year, datestr=i, calendar_date=resolved[i],
+                )
+                for i in datestrs
+                if i in resolved
+            ],
+        )
+        if commit:
+            db.commit()
+
+    def replace_year(
+        self,
+        db: Session,
+        *,
+        calendar: str,
+        year: int,
+        datestrs: List[str],
+        dates: List[date],
+        commit: bool = True,
+    ) -> None:
+        """Replace everything stored for one year of a calendar."""
+        self.lock_year(db, year=year)
+        db.query(self.model).filter(
+            self.model.calendar == calendar, self.model.year == year
+        ).delete(synchronize_session=False)
+        db.bulk_insert_mappings(
+            self.model,
+            [
+                dict(calendar=calendar, year=year, datestr=i, calendar_date=j)
+                for i, j in zip(datestrs, dates)
+            ],
+        )
+        if commit:
+            db.commit()
+
+
+calendar_date = CRUDCalendarDate(CalendarDate)
+
+
+class CRUDCalendarYear(
+    CRUDBase[CalendarYear, schemas.CalendarYear, schemas.CalendarYear]
+):
+    def get_all(self, db: Session) -> List[CalendarYear]:
+        return db.query(self.model).order_by(self.model.calendar, self.model.year).all()
+
+    def is_fresh(
+        self, db: Session, *, calendar: str, year: int, max_age: timedelta
+    ) -> bool:
+        query = db.query(self.model.id).filter(
+            self.model.calendar == calendar,
+            self.model.year == year,
+            self.model.refreshed_at > datetime.utcnow() - max_age,
+        )
+        return db.query(query.exists()).scalar()
+
+    def touch(
+        self, db: Session, *, calendar: str, year: int, commit: bool = True
+    ) -> None:
+        """Record that a year has just been refreshed."""
+        stmt = insert(self.model.__table__).values(
+            calendar=calendar, year=year, refreshed_at=datetime.utcnow()
+        )
+        db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=["calendar", "year"],
+                set_={"refreshed_at": stmt.excluded.refreshed_at},
+            )
+        )
+        if commit:
+            db.commit()
+
+
+calendar_year = CRUDCalendarYear(CalendarYear)
+
+
+class CRUDRenderedOldDate(
+    CRUDBase[RenderedOldDate, schemas.RenderedOldDate, schemas.RenderedOldDate]
+):
+    def replace(
+        self,
+        db: Session,
+        *,
+        calendar: str,
+        year: int,
+        rendered: Dict[int, str],
+        martyrology_ids: List[int] = None,
+        commit: bool = True,
+    ) -> None:
+        """
+        Replace rendered old dates in one year of a calendar.
+
+        Only rows for `martyrology_ids` are replaced if given, otherwise
+        the whole year is.
+        """
+        query = db.query(self.model).filter(
+            self.model.calendar == calendar, self.model.year == year
+        )
+        if martyrology_ids is not None:
+            query = query.filter(self.model.martyrology_id.in_(martyrology_ids))
+        query.delete(synchronize_session=False)
+        db.bulk_insert_mappings(
+            self.model,
+            [
+                dict(calendar=calendar, year=year, martyrology_id=i, old_date=j)
+                for i, j in rendered.items()
+            ],
+        )
+        if commit:
+            db.commit()
+
+
+rendered_old_date = CRUDRenderedOldDate(RenderedOldDate)
+
+
+class CRUDCalendarJob(
+    CRUDBase[CalendarJob, schemas.CalendarJobCreate, schemas.CalendarJob]
+):
+    def create_with_owner(
+        self,
+        db: Session,
+        *,
+        obj_in: schemas.CalendarJobCreate,
+        owner_id: Optional[int],
+    ) -> CalendarJob:
+        db_obj = self.model(
+            id=uuid4().hex,
+            status="PENDING",
+            first_year=obj_in.first_year,
+            last_year=obj_in.last_year,
+            done=0,
+            total=0,
+            resolved=0,
+            errors=0,
+            created_at=datetime.utcnow(),
+            last_polled_at=datetime.utcnow(),
+            owner_id=owner_id,
+        )
+        db.add(db_obj)
+        db.commit()
+        db.refresh(db_obj)
+        return db_obj
+
+    def get_unfinished(self, db: Session) -> List[CalendarJob]:
+        return (
+            db.query(self.model)
+            .filter(self.model.status.in_(["PENDING", "STARTED"]))
+            .all()
+        )
+
+    def get_active(self, db: Session, *, year: int) -> Optional[CalendarJob]:
+        """Get an unfinished job covering a year, if there is one."""
+        return (
+            db.query(self.model)
+            .filter(
+                self.model.status.in_(["PENDING", "STARTED"]),
+                self.model.first_year <= year,
+                self.model.last_year >= year,
+            )
+            .first()
+        )
+
+    def start(self, db: Session, *, id: str, total: int) -> bool:
+        """Start a job, returning False if it has been revoked or finished."""
+        count = (
+            db.query(self.model)
+            .filter(self.model.id == id, self.model.status.in_(["PENDING", "STARTED"]))
+            .update(
+                {"status": "STARTED", "started_at": datetime.utcnow(), "total": total},
+                synchronize_session=False,
+            )
+        )
+        db.commit()
+        return bool(count)
+
+    def touch_polled(self, db: Session, *, id: str) -> None:
+        """Record that someone is still waiting for a job."""
+        db.query(self.model).filter(self.model.id == id).update(
+            {"last_polled_at": datetime.utcnow()}, synchronize_session=False
+        )
+        db.commit()
+
+    def revoke(self, db: Session, *, id: str) -> bool:
+        """Mark a job revoked, returning whether it was still unfinished."""
+        count = (
+            db.query(self.model)
+            .filter(self.model.id == id, self.model.status.in_(["PENDING", "STARTED"]))
+            .update(
+                {"status": "REVOKED", "finished_at": datetime.utcnow()},
+                synchronize_session=False,
+            )
+        )
+        db.commit()
+        return bool(count)
+
+    def advance(
+        self, db: Session, *, id: str, done: int = 1, resolved: int = 0, errors: int = 0
+    ) -> None:
+        """Record progress atomically, so several workers may report at once."""
+        db.query(self.model).filter(self.model.id == id).update(
+            {
+                "done": self.model.done + done,
+                "resolved": self.model.resolved + resolved,
+                "errors": self.model.errors + errors,
+            },
+            synchronize_session=False,
+        )
+        db.commit()
+
+    def finish(
+        self,
+        db: Session,
+        *,
+        id: str,
+        result: Optional[Dict[str, Any]] = None,
+        error: Optional[str] = None,
+    ) -> None:
+        """Finish a job, unless it is already finished or revoked."""
+        db.query(self.model).filter(
+            self.model.id == id, self.model.status.in_(["PENDING", "STARTED"])
+        ).update(
+            {
+                "status": "FAILURE" if error else "SUCCESS",
+                "result": result,
+                "error": error,
+                "finished_at": datetime.utcnow(),
+            },
+            synchronize_session=False,
+        )
+        db.commit()
+
+
+calendar_job = CRUDCalendarJob(CalendarJob)
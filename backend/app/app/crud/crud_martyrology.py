@@ -1,7 +1,7 @@
-from typing import Optional
+from typing import List, Optional
 
 from fastapi.encoders import jsonable_encoder
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload, load_only
 
 from app import schemas
 from app.crud.base import CRUDBase, CRUDWithOwnerBase
@@ -12,9 +12,39 @@ from app.schemas.martyrology import MartyrologyCreate, MartyrologyUpdate
 class CRUDMartyrology(
     CRUDWithOwnerBase[Martyrology, MartyrologyCreate, MartyrologyUpdate]
 ):
+    large_columns = ("parts",)
+    eager_load = ("old_date_template.ordinals",)
+
     def get_by_datestr(self, db: Session, *, datestr: str) -> Optional[Martyrology]:
         return db.query(Martyrology).filter(Martyrology.datestr == datestr)
 
+    def get_datestrs(
+        self, db: Session, *, datestrs: Optional[List[str]] = None
+    ) -> List[str]:
+        """Get distinct datestrs in use, optionally only from those given."""
+        query = db.query(Martyrology.datestr)
+        if datestrs is not None:
+            query = query.filter(Martyrology.datestr.in_(datestrs))
+        return [i for (i,) in query.distinct()]
+
+    def get_for_rendering(
+        self, db: Session, *, datestrs: Optional[List[str]] = None
+    ) -> List[Martyrology]:
+        """Get entries with a template, loading only what rendering needs."""
+        query = (
+            db.query(Martyrology)
+            .options(
+                load_only("id", "datestr", "julian_date"),
+                joinedload(Martyrology.old_date_template).joinedload(
+                    OldDateTemplate.ordinals
+                ),
+            )
+            .filter(Martyrology.old_date_template_id.isnot(None))
+        )
+        if datestrs is not None:
+            query = query.filter(Martyrology.datestr.in_(datestrs))
+        return query.all()
+
     def get(self, db: Session, id: int):
         obj = db.query(self.model).get(id)
         return obj
@@ -41,7 +71,7 @@ class CRUDOldDateTemplate(
         schemas.martyrology.OldDateTemplate,
     ]
 ):
-    pass
+    eager_load = ("ordinals",)
 
 
 old_date_template = CRUDOldDateTemplate(OldDateTemplate)
@@ -0,0 +1,48 @@
+from datetime import datetime
+from typing import Dict, List
+
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.crud.base import CRUDBase
+from app.models.task_metric import TaskMetric
+from app.schemas.task_metric import TaskMetric as TaskMetricSchema
+
+TOTALS = (
+    "count",
+    "retries",
+    "failures",
+    "waited",
+    "wait_seconds",
+    "runtime_seconds",
+    "result_bytes",
+)
+MAXIMA = ("wait_max", "runtime_max", "result_bytes_max")
+
+
+class CRUDTaskMetric(CRUDBase[TaskMetric, TaskMetricSchema, TaskMetricSchema]):
+    def get_all(self, db: Session) -> List[TaskMetric]:
+        return db.query(self.model).order_by(self.model.name).all()
+
+    def record(self, db: Session, *, metrics: Dict[str, Dict[str, float]]) -> None:
+        """
+        Add metrics, as `{task name: {column: value}}`, to the totals.
+
+        Totals are incremented (and maxima raised) in the database, so any
+        number of processes may record at once.
+        """
+        table = self.model.__table__
+        for name, values in metrics.items():
+            row = {i: values.get(i, 0) for i in TOTALS + MAXIMA}
+            stmt = insert(table).values(name=name, updated_at=datetime.utcnow(), **row)
+            update = {i: table.c[i] + stmt.excluded[i] for i in TOTALS}
+            update.update(
+                {i: func.greatest(table.c[i], stmt.excluded[i]) for i in MAXIMA}
+            )
+            update["updated_at"] = stmt.excluded.updated_at
+            db.execute(stmt.on_conflict_do_update(index_elements=["name"], set_=update))
+        db.commit()
+
+
+task_metric = CRUDTaskMetric(TaskMetric)
@@ -0,0 +1,162 @@
+"""
+Compile list filters into SQL.
+
+Filters are JSON objects mapping columns to a value, which must be equal,
+or to an operator and its argument, such as `{"language": {"in": ["en",
+"la"]}}` or `{"datestr": {"prefix": "1 "}}`.  Several filters in a list
+must all match.
+
+Operators are `eq`, `in`, `prefix` (string columns only) and `range`, a
+pair of inclusive bounds either of which may be null.  Only columns the
+caller allows may be filtered, which should be those with an index:
+
+>>> from app.crud.filters import compile_filters
+>>> from app.models.martyrology import Martyrology
+>>> compile_filters(Martyrology, ["language"], [{"rubrics": "x"}])
+Traceback (most recent call last):
+...
+app.crud.filters.FilterError: Cannot filter on rubrics
+"""
+from datetime import date
+from typing import Any, Callable, Dict, Iterable, List
+
+from sqlalchemy import String, and_
+from sqlalchemy.sql import ClauseElement
+
+from app.db.base_class import Base
+
+"""Most values an `in` filter may have."""
+MAX_IN_VALUES = 1000
+
+
+class FilterError(ValueError):
+    pass
+
+
+def coerce(column, value: Any) -> Any:
+    """
+    Convert a filter value to the Python type of its column.
+
+    Raises `FilterError` if it can't be, rather than letting the database
+    reject it.  Columns of types without a Python type take values as they
+    are.
+    """
+    if value is None:
+        return None
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return value
+    invalid = FilterError(f"Invalid value for {column.key}: {value!r}")
+    # JSON booleans are ints to Python, but not to the database
+    if isinstance(value, (bool, dict, list)) or python_type is bool:
+        if isinstance(value, bool) and python_type is bool:
+            return value
+        raise invalid
+    if isinstance(value, python_type):
+        return value
+    try:
+        if issubclass(python_type, date):
+            return python_type.fromisoformat(value)
+        return python_type(value)
+    except (TypeError, ValueError):
+        raise invalid
+
+
+def _eq(column, value: Any) -> ClauseElement:
+    return column == coerce(column, value)
+
+
+def _in(column, values: Any) -> ClauseElement:
+    if not isinstance(values, list) or not values:
+        raise FilterError(f"'in' filter on {column.key} needs a list of values")
+    if len(values) > MAX_IN_VALUES:
+        raise FilterError(f"'in' filter on {column.key} has too many values")
+    return column.in_([coerce(column, i) for i in values])
+
+
+def _prefix(column, prefix: Any) -> ClauseElement:
+    if not isinstance(column.type, String):
+        raise FilterError(f"Cannot filter {column.key} by prefix")
+    if not isinstance(prefix, str) or not prefix:
+        raise FilterError(f"'prefix' filter on {column.key} needs a string")
+    return column.startswith(prefix, autoescape=True)
+
+
+def _range(column, bounds: Any) -> ClauseElement:
+    if not isinstance(bounds, list) or len(bounds) != 2:
+        raise FilterError(f"'range' filter on {column.key} needs [start, end]")
+    start, end = (coerce(column, i) for i in bounds)
+    clauses = []
+    if start is not None:
+        clauses.append(column >= start)
+    if end is not None:
+        clauses.append(column <= end)
+    return and_(*clauses)
+
+
+OPERATORS: Dict[str, Callable[[Any, Any], ClauseElement]] = {
+    "eq": _eq,
+    "in": _in,
+    "prefix": _prefix,
+    "range": _range,
+}
+
+
+def indexed_columns(model: Base) -> List[str]:
+    """Get the columns which lead an index of a model's table."""
+    table = model.__table__
+    columns = [i.key for i in table.primary_key.columns]
+    for index in table.indexes:
+        first = next(iter(index.columns), None)
+        if first is not None and first.key not in columns:
+            columns.append(first.key)
+    return columns
+
+
+def compile_filter(model: Base, name: str, value: Any) -> ClauseElement:
+    column = getattr(model, name)
+    if not isinstance(value, dict):
+        return _eq(column, value)
+    if len(value) != 1:
+        raise FilterError(f"Filter on {name} needs exactly one operator")
+    ((op, argument),) = value.items()
+    if op not in OPERATORS:
+        raise FilterError(f"Unknown filter operator {op}")
+    return OPERATORS[op](column, argument)
+
+
+def compile_filters(
+    model: Base, filterable: Iterable[str], filters: List[Dict[str, Any]]
+) -> List[ClauseElement]:
+    """
+    Compile filters on a model.
+
+    Parameters
+    ----------
+    model: Base : Model to filter.
+
+    filterable: Iterable[str] : Columns which may be filtered.
+
+    filters: List[Dict[str, Any]] : Filters, combined with AND.
+
+    Returns
+    -------
+    List[ClauseElement]
+        Expressions to pass to `Query.filter()`.
+
+    Raises
+    ------
+    FilterError
+        If a filter is malformed or on a column not in `filterable`.
+    """
+    filterable = set(filterable)
+    clauses = []
+    for f in filters:
+        if not isinstance(f, dict):
+            raise FilterError("Filters must be objects")
+        for name, value in f.items():
+            if name not in filterable:
+                raise FilterError(f"Cannot filter on {name}")
+            clauses.append(compile_filter(model, name, value))
+    return clauses
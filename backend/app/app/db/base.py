@@ -1,5 +1,12 @@
 # Import all the models, so that Base has them before being
 # imported by Alembic
 from app.db.base_class import Base  # noqa
+from app.models.calendar import (  # noqa
+    CalendarDate,
+    CalendarJob,
+    CalendarYear,
+    RenderedOldDate,
+)
 from app.models.item import Item  # noqa
+from app.models.task_metric import TaskMetric  # noqa
 from app.models.user import User  # noqa
@@ -1,3 +1,5 @@
+from .calendar import CalendarDate, CalendarJob, CalendarYear, RenderedOldDate
 from .item import Item
 from .martyrology import Martyrology
+from .task_metric import TaskMetric
 from .user import User
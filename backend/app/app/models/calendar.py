@@ -0,0 +1,70 @@
+from sqlalchemy import Column, Date, DateTime, ForeignKey, Index, Integer, String
+
+from app.db.base_class import Base
+
+from .martyrology import JSONEncodedDict
+
+
+class CalendarDate(Base):
+    """A datestr resolved in one year of one calendar."""
+
+    __table_args__ = (
+        Index(
+            "ix_calendardate_calendar_year_datestr",
+            "calendar",
+            "year",
+            "datestr",
+            unique=True,
+        ),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    calendar = Column(String, index=True)
+    year = Column(Integer, index=True)
+    datestr = Column(String, index=True)
+    calendar_date = Column(Date(), index=True)
+
+
+class CalendarYear(Base):
+    """When one year of one calendar was last fully materialised."""
+
+    __table_args__ = (
+        Index("ix_calendaryear_calendar_year", "calendar", "year", unique=True),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    calendar = Column(String, index=True)
+    year = Column(Integer, index=True)
+    refreshed_at = Column(DateTime())
+
+
+class RenderedOldDate(Base):
+    """A martyrology entry's old date, rendered for one year of one calendar."""
+
+    id = Column(Integer, primary_key=True, index=True)
+    martyrology_id = Column(
+        Integer, ForeignKey("martyrology.id", ondelete="CASCADE"), index=True
+    )
+    calendar = Column(String, index=True)
+    year = Column(Integer, index=True)
+    old_date = Column(String)
+
+
+class CalendarJob(Base):
+    """A background calendar computation and its progress."""
+
+    id = Column(String, primary_key=True, index=True)
+    status = Column(String, index=True, default="PENDING")
+    first_year = Column(Integer)
+    last_year = Column(Integer)
+    done = Column(Integer, default=0)
+    total = Column(Integer, default=0)
+    resolved = Column(Integer, default=0)
+    errors = Column(Integer, default=0)
+    result = Column(JSONEncodedDict)
+    error = Column(String)
+    created_at = Column(DateTime())
+    started_at = Column(DateTime())
+    finished_at = Column(DateTime())
+    last_polled_at = Column(DateTime())
+    owner_id = Column(Integer, ForeignKey("user.id"))
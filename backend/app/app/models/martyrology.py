@@ -1,8 +1,11 @@
 import json
+from datetime import date
+from functools import lru_cache
 from typing import TYPE_CHECKING
 
 import pylunar
-from sqlalchemy import Column, ForeignKey, Integer, PickleType, String, types
+from jinja2 import BaseLoader, Environment, Template
+from sqlalchemy import Column, ForeignKey, Index, Integer, PickleType, String, types
 from sqlalchemy.ext.mutable import MutableList
 from sqlalchemy.orm import relationship
 from sqlalchemy.types import VARCHAR, Date, TypeDecorator
@@ -40,13 +43,28 @@ class JSONEncodedDict(TypeDecorator):
         return value
 
 
+@lru_cache(maxsize=None)
+def compile_template(content: str) -> Template:
+    """Compile an old date template once per process."""
+    return Environment(loader=BaseLoader).from_string(content)
+
+
 class Martyrology(Base):
     """Martyrology object in database."""
 
+    __table_args__ = (
+        # lets LIKE 'prefix%' use an index whatever the collation
+        Index(
+            "ix_martyrology_datestr_pattern",
+            "datestr",
+            postgresql_ops={"datestr": "varchar_pattern_ops"},
+        ),
+    )
+
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, index=True)
     rubrics = Column(String)
-    language = Column(String)
+    language = Column(String, index=True)
 
     datestr = Column(String, index=True)
     old_date_template_id = Column(Integer, ForeignKey("olddatetemplate.id"))
@@ -56,6 +74,8 @@ class Martyrology(Base):
     parts = Column(MutableList.as_mutable(JSONEncodedDict), default=[])
     owner_id = Column(Integer, ForeignKey("user.id"))
     owner = relationship("User", back_populates="martyrologies")
+    # bumped by every update, for ETags
+    version = Column(Integer, nullable=False, default=1, server_default="1")
 
     def lunar(self):
         """Calculate age of moon as integer."""
@@ -65,17 +85,14 @@ class Martyrology(Base):
         age = round(m.age())
         return age
 
-    def render_old_date(self, year: int):
-        """"""
-        self.date = dsl_parser(self.datestr, year)
+    def render_old_date(self, year: int, calendar_date: date = None):
+        """Render the old date, resolving the datestr unless a date is given."""
+        self.date = calendar_date or dsl_parser(self.datestr, year)
         age = self.lunar()
 
-        from jinja2 import BaseLoader, Environment
-
-        template = self.old_date_template.content
-        template = Environment(loader=BaseLoader).from_string(template)
+        template = compile_template(self.old_date_template.content)
         self.old_date = template.render(
-            ordinals=self.ordinals.content,
+            ordinals=self.old_date_template.ordinals.content,
             year=year,
             age=age,
             julian_date=self.julian_date,
@@ -90,6 +107,8 @@ class Ordinals(Base):
     language = Column(String())
     owner_id = Column(Integer, ForeignKey("user.id"))
     owner = relationship("User", back_populates="ordinals")
+    # bumped by every update, for ETags
+    version = Column(Integer, nullable=False, default=1, server_default="1")
 
 
 class OldDateTemplate(Base):
@@ -107,6 +126,8 @@ class OldDateTemplate(Base):
     ordinals = relationship("Ordinals")
     owner_id = Column(Integer, ForeignKey("user.id"))
     owner = relationship("User", back_populates="old_date_templates")
+    # bumped by every update, for ETags
+    version = Column(Integer, nullable=False, default=1, server_default="1")
 
 
 def get_date_table(table_name):
@@ -23,6 +23,12 @@ valid_calendars = [
     "1960",
 ]  # list of valid calendars. Might need an object list instead.  Or perhaps don't check and rely on in
 
+"""
+Rules which differ between calendars, as {calendar: {datestr: rule}}.
+Any datestr not listed resolves identically in every calendar.
+"""
+calendar_overrides = {calendar: {} for calendar in valid_calendars}
+
 """Valid types of day."""
 valid_day_types = ["de Tempore", "Sanctorum"]
 
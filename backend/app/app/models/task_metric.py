@@ -0,0 +1,33 @@
+from sqlalchemy import BigInteger, Column, DateTime, Float, Integer, String
+
+from app.db.base_class import Base
+
+
+class TaskMetric(Base):
+    """Running totals of the queue wait, runtime and result size of a task."""
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, unique=True, index=True)
+    count = Column(BigInteger, default=0)
+    retries = Column(Integer, default=0)
+    failures = Column(Integer, default=0)
+    waited = Column(BigInteger, default=0)
+    wait_seconds = Column(Float, default=0.0)
+    wait_max = Column(Float, default=0.0)
+    runtime_seconds = Column(Float, default=0.0)
+    runtime_max = Column(Float, default=0.0)
+    result_bytes = Column(BigInteger, default=0)
+    result_bytes_max = Column(BigInteger, default=0)
+    updated_at = Column(DateTime())
+
+    @property
+    def mean_wait(self) -> float:
+        return self.wait_seconds / self.waited if self.waited else 0.0
+
+    @property
+    def mean_runtime(self) -> float:
+        return self.runtime_seconds / self.count if self.count else 0.0
+
+    @property
+    def mean_result_bytes(self) -> float:
+        return self.result_bytes / self.count if self.count else 0.0
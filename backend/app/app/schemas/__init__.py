@@ -1,3 +1,15 @@
+from .calendar import (
+    CalendarDate,
+    CalendarDateCreate,
+    CalendarDateUpdate,
+    CalendarJob,
+    CalendarJobCreate,
+    CalendarYear,
+    RenderedOldDate,
+    Resolution,
+    ResolutionCreate,
+)
+from .bulk import BulkResult
 from .item import Item, ItemCreate, ItemInDB, ItemUpdate
 from .martyrology import (
     Martyrology,
@@ -10,5 +22,6 @@ from .martyrology import (
 )
 from .msg import Msg
 from .office_parts import Block, BlockCreate, BlockInDB, BlockUpdate
+from .task_metric import TaskMetric
 from .token import Token, TokenPayload
 from .user import User, UserCreate, UserInDB, UserUpdate
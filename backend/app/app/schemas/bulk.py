@@ -0,0 +1,7 @@
+from pydantic import BaseModel
+
+
+# Properties to return to client
+class BulkResult(BaseModel):
+    id: int
+    status: str
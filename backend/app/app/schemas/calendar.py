@@ -0,0 +1,124 @@
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel, validator
+
+from app.core.config import settings
+
+# Years which may be resolved: the Gregorian calendar was first used in
+# 1582, and dates stop at 9999
+FIRST_YEAR = 1583
+LAST_YEAR = 9999
+
+
+def check_year(year: int) -> int:
+    if not FIRST_YEAR <= year <= LAST_YEAR:
+        raise ValueError(f"year must be from {FIRST_YEAR} to {LAST_YEAR}")
+    return year
+
+
+# Shared properties
+class CalendarDateBase(BaseModel):
+    calendar: str
+    year: int
+    datestr: str
+    calendar_date: date
+
+
+# Properties to receive on creation
+class CalendarDateCreate(CalendarDateBase):
+    pass
+
+
+# Properties to receive on update
+class CalendarDateUpdate(CalendarDateBase):
+    pass
+
+
+# Properties to return to client
+class CalendarDate(CalendarDateBase):
+    id: int
+
+    class Config:
+        orm_mode = True
+
+
+# Properties to return to client
+class CalendarYear(BaseModel):
+    calendar: str
+    year: int
+    refreshed_at: datetime
+
+    class Config:
+        orm_mode = True
+
+
+# Properties to return to client
+class RenderedOldDate(BaseModel):
+    martyrology_id: int
+    calendar: str
+    year: int
+    old_date: str
+
+    class Config:
+        orm_mode = True
+
+
+# Properties to receive on job creation
+class CalendarJobCreate(BaseModel):
+    first_year: int
+    last_year: Optional[int] = None
+
+    _check_first_year = validator("first_year", allow_reuse=True)(check_year)
+
+    @validator("last_year", always=True)
+    def default_to_first_year(cls, v: Optional[int], values: Dict[str, Any]) -> int:
+        first_year = values.get("first_year")
+        if v is None:
+            return first_year
+        check_year(v)
+        if first_year is not None and v < first_year:
+            raise ValueError("last_year must not be before first_year")
+        if first_year is not None and v - first_year >= settings.CALENDAR_JOB_MAX_YEARS:
+            raise ValueError(
+                f"jobs may span at most {settings.CALENDAR_JOB_MAX_YEARS} years"
+            )
+        return v
+
+
+# Properties to return to client
+class CalendarJob(BaseModel):
+    id: str
+    status: str
+    first_year: int
+    last_year: int
+    done: int
+    total: int
+    resolved: int = 0
+    errors: int = 0
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    last_polled_at: Optional[datetime] = None
+
+    class Config:
+        orm_mode = True
+
+
+# Properties to receive on resolution request
+class ResolutionCreate(BaseModel):
+    datestrs: List[str]
+    year: int
+
+    _check_year = validator("year", allow_reuse=True)(check_year)
+
+
+# Properties to return to client
+class Resolution(BaseModel):
+    id: str
+    status: str
+    datestrs: Optional[List[str]] = None
+    dates: Optional[Dict[str, List[date]]] = None
+    stats: Optional[Dict[str, Dict[str, float]]] = None
@@ -0,0 +1,22 @@
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+# Properties to return to client
+class TaskMetric(BaseModel):
+    name: str
+    count: int
+    retries: int
+    failures: int
+    mean_wait: float
+    wait_max: float
+    mean_runtime: float
+    runtime_max: float
+    mean_result_bytes: float
+    result_bytes_max: int
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        orm_mode = True
@@ -0,0 +1,124 @@
+import json
+from typing import Dict
+
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app import crud, schemas
+from app.core.config import settings
+
+
+def test_create_job(
+    client: TestClient, superuser_token_headers: Dict[str, str]
+) -> None:
+    data = {"first_year": 2020, "last_year": 2021}
+    r = client.post(
+        f"{settings.API_V1_STR}/calendar/jobs",
+        json=data,
+        headers=superuser_token_headers,
+    )
+    assert r.status_code == 202
+    job = r.json()
+    assert job["first_year"] == 2020
+    assert job["last_year"] == 2021
+    r = client.get(
+        f"{settings.API_V1_STR}/calendar/jobs/{job['id']}",
+        headers=superuser_token_headers,
+    )
+    assert r.status_code == 200
+    assert r.json()["id"] == job["id"]
+
+
+def test_create_job_bad_range(
+    client: TestClient, superuser_token_headers: Dict[str, str]
+) -> None:
+    data = {"first_year": 2021, "last_year": 2020}
+    r = client.post(
+        f"{settings.API_V1_STR}/calendar/jobs",
+        json=data,
+        headers=superuser_token_headers,
+    )
+    assert r.status_code == 422
+
+
+def test_resolution_is_keyed_by_content(
+    client: TestClient, superuser_token_headers: Dict[str, str]
+) -> None:
+    ids = []
+    for datestrs in (["Easter", "1 Jan"], ["1 Jan", "Easter", "1 Jan"]):
+        r = client.post(
+            f"{settings.API_V1_STR}/calendar/resolve",
+            json={"datestrs": datestrs, "year": 2020},
+            headers=superuser_token_headers,
+        )
+        assert r.status_code in (200, 202)
+        ids.append(r.json()["id"])
+    assert ids[0] == ids[1]
+
+
+def test_job_events_end_when_finished(
+    client: TestClient, superuser_token_headers: Dict[str, str], db: Session
+) -> None:
+    job_in = schemas.CalendarJobCreate(first_year=2020)
+    job = crud.calendar_job.create_with_owner(db, obj_in=job_in, owner_id=None)
+    crud.calendar_job.start(db, id=job.id, total=1)
+    crud.calendar_job.advance(db, id=job.id, resolved=10)
+    crud.calendar_job.finish(db, id=job.id, result={})
+    r = client.get(
+        f"{settings.API_V1_STR}/calendar/jobs/{job.id}/events",
+        headers=superuser_token_headers,
+    )
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/event-stream")
+    events = r.text.split("\n\n")
+    assert events[0].startswith("event: progress")
+    progress = json.loads(events[0].split("data: ", 1)[1])
+    assert progress["done"] == 1
+    assert progress["resolutions"] == 10
+    assert progress["status"] == "SUCCESS"
+    assert events[1].startswith("event: end")
+
+
+def test_revoke_job(
+    client: TestClient, superuser_token_headers: Dict[str, str], db: Session
+) -> None:
+    job_in = schemas.CalendarJobCreate(first_year=2020)
+    job = crud.calendar_job.create_with_owner(db, obj_in=job_in, owner_id=None)
+    url = f"{settings.API_V1_STR}/calendar/jobs/{job.id}/revoke"
+    r = client.post(url, headers=superuser_token_headers)
+    assert r.status_code == 200
+    assert r.json()["status"] == "REVOKED"
+    assert not crud.calendar_job.start(db, id=job.id, total=1)
+    r = client.post(url, headers=superuser_token_headers)
+    assert r.status_code == 400
+
+
+def test_normal_user_can_poll_unmaterialised_year(
+    client: TestClient, normal_user_token_headers: Dict[str, str]
+) -> None:
+    r = client.get(
+        f"{settings.API_V1_STR}/martyrology/test-datestr/2399",
+        headers=normal_user_token_headers,
+    )
+    assert r.status_code == 202
+    job = r.json()
+    r = client.get(r.headers["Location"], headers=normal_user_token_headers)
+    assert r.status_code == 200
+    assert r.json()["id"] == job["id"]
+    assert r.json()["last_polled_at"] >= job["last_polled_at"]
+
+
+def test_create_job_too_long(
+    client: TestClient, superuser_token_headers: Dict[str, str]
+) -> None:
+    for data in (
+        {"first_year": 2020, "last_year": 2020 + settings.CALENDAR_JOB_MAX_YEARS},
+        {"first_year": 1, "last_year": 2},
+        {"first_year": 9999, "last_year": 10000},
+    ):
+        r = client.post(
+            f"{settings.API_V1_STR}/calendar/jobs",
+            json=data,
+            headers=superuser_token_headers,
+        )
+        assert r.status_code == 422
@@ -0,0 +1,226 @@
+import json
+from typing import Dict
+
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app import crud
+from app.api.api_v1.endpoints.item_base import encode_cursor
+from app.core.config import settings
+from app.tests.utils.martyrology import (
+    create_random_old_date_template,
+    create_random_ordinals,
+)
+from app.tests.utils.user import create_random_user
+from app.tests.utils.utils import random_lower_string
+
+ORDINALS = f"{settings.API_V1_STR}/martyrology/ordinals"
+
+
+def test_read_not_modified(
+    client: TestClient, superuser_token_headers: Dict[str, str], db: Session
+) -> None:
+    ordinals = create_random_ordinals(db)
+    r = client.get(f"{ORDINALS}/{ordinals.id}", headers=superuser_token_headers)
+    assert r.status_code == 200
+    etag = r.headers["ETag"]
+    r = client.get(
+        f"{ORDINALS}/{ordinals.id}",
+        headers={**superuser_token_headers, "If-None-Match": etag},
+    )
+    assert r.status_code == 304
+    assert not r.content
+
+
+def test_etag_changes_after_update(
+    client: TestClient, superuser_token_headers: Dict[str, str], db: Session
+) -> None:
+    ordinals = create_random_ordinals(db)
+    r = client.get(
+        f"{ORDINALS}/?after={encode_cursor(ordinals.id - 1)}&limit=1",
+        headers=superuser_token_headers,
+    )
+    list_etag = r.headers["ETag"]
+    r = client.get(f"{ORDINALS}/{ordinals.id}", headers=superuser_token_headers)
+    etag = r.headers["ETag"]
+    r = client.patch(
+        f"{ORDINALS}/{ordinals.id}",
+        json={"language": "en"},
+        headers=superuser_token_headers,
+    )
+    assert r.status_code == 200
+    r = client.get(
+        f"{ORDINALS}/{ordinals.id}",
+        headers={**superuser_token_headers, "If-None-Match": etag},
+    )
+    assert r.status_code == 200
+    assert r.headers["ETag"] != etag
+    assert r.json()["language"] == "en"
+    r = client.get(
+        f"{ORDINALS}/?after={encode_cursor(ordinals.id - 1)}&limit=1",
+        headers={**superuser_token_headers, "If-None-Match": list_etag},
+    )
+    assert r.status_code == 200
+
+
+def test_bulk_create(
+    client: TestClient, superuser_token_headers: Dict[str, str], db: Session
+) -> None:
+    template = create_random_old_date_template(db)
+    data = [
+        {
+            "datestr": "1 Jan",
+            "title": random_lower_string(),
+            "language": "la",
+            "old_date_template_id": template.id,
+        }
+        for _ in range(2)
+    ]
+    r = client.post(
+        f"{settings.API_V1_STR}/martyrology/bulk",
+        json=data,
+        headers=superuser_token_headers,
+    )
+    assert r.status_code == 200
+    assert [i["title"] for i in r.json()] == [i["title"] for i in data]
+
+
+def test_bulk_update_and_delete(
+    client: TestClient, normal_user_token_headers: Dict[str, str], db: Session
+) -> None:
+    user = crud.user.get_by_email(db, email=settings.EMAIL_TEST_USER)
+    mine = create_random_ordinals(db, owner_id=user.id)
+    theirs = create_random_ordinals(db, owner_id=create_random_user(db).id)
+    missing = theirs.id + 1000000
+    ids = [mine.id, theirs.id, missing]
+    r = client.patch(
+        f"{ORDINALS}/bulk",
+        json={"ids": ids, "item_in": {"language": "en"}},
+        headers=normal_user_token_headers,
+    )
+    assert r.status_code == 200
+    assert r.json() == [
+        {"id": mine.id, "status": "updated"},
+        {"id": theirs.id, "status": "not enough permissions"},
+        {"id": missing, "status": "not found"},
+    ]
+    r = client.delete(
+        f"{ORDINALS}/bulk", params={"ids": ids}, headers=normal_user_token_headers,
+    )
+    assert r.status_code == 200
+    assert [i["status"] for i in r.json()] == [
+        "deleted",
+        "not enough permissions",
+        "not found",
+    ]
+
+
+def test_bulk_limits(
+    client: TestClient, superuser_token_headers: Dict[str, str]
+) -> None:
+    ids = list(range(1, settings.BULK_MAX_ITEMS + 2))
+    r = client.patch(
+        f"{ORDINALS}/bulk",
+        json={"ids": ids, "item_in": {"language": "en"}},
+        headers=superuser_token_headers,
+    )
+    assert r.status_code == 413
+    r = client.patch(
+        f"{ORDINALS}/bulk",
+        json={"ids": ids[:1], "item_in": {"language": None}},
+        headers=superuser_token_headers,
+    )
+    assert r.status_code == 422
+
+
+def test_bulk_update_keeps_primary_key(
+    client: TestClient, superuser_token_headers: Dict[str, str], db: Session
+) -> None:
+    ids = [create_random_ordinals(db).id for _ in range(2)]
+    r = client.patch(
+        f"{ORDINALS}/bulk",
+        json={"ids": ids, "item_in": {"id": ids[0], "language": "en"}},
+        headers=superuser_token_headers,
+    )
+    assert r.status_code == 200
+    assert [i["status"] for i in r.json()] == ["updated", "updated"]
+    for id in ids:
+        r = client.get(f"{ORDINALS}/{id}", headers=superuser_token_headers)
+        assert r.json()["language"] == "en"
+
+
+def test_bad_fields(
+    client: TestClient, superuser_token_headers: Dict[str, str]
+) -> None:
+    r = client.get(
+        f"{ORDINALS}/", params={"fields": "id,nope"}, headers=superuser_token_headers
+    )
+    assert r.status_code == 400
+
+
+def test_sparse_fields(
+    client: TestClient, superuser_token_headers: Dict[str, str], db: Session
+) -> None:
+    ordinals = create_random_ordinals(db)
+    r = client.get(
+        f"{ORDINALS}/",
+        params={
+            "fields": "language",
+            "after": encode_cursor(ordinals.id - 1),
+            "limit": 1,
+        },
+        headers=superuser_token_headers,
+    )
+    assert r.status_code == 200
+    assert r.json() == [{"id": ordinals.id, "language": ordinals.language}]
+
+
+def test_bad_filters(
+    client: TestClient, superuser_token_headers: Dict[str, str]
+) -> None:
+    for params in (
+        {"filters": json.dumps({"content": "x"})},
+        {"filters": json.dumps({"id": "abc"})},
+        {"filters": json.dumps({"id": {"nope": 1}})},
+        {"filters": "{"},
+    ):
+        r = client.get(f"{ORDINALS}/", params=params, headers=superuser_token_headers)
+        assert r.status_code == 400, params
+
+
+def test_export_only_owned(
+    client: TestClient, normal_user_token_headers: Dict[str, str], db: Session
+) -> None:
+    user = crud.user.get_by_email(db, email=settings.EMAIL_TEST_USER)
+    mine = create_random_ordinals(db, owner_id=user.id)
+    theirs = create_random_ordinals(db, owner_id=create_random_user(db).id)
+    r = client.get(f"{ORDINALS}/export", headers=normal_user_token_headers)
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("application/x-ndjson")
+    ids = [json.loads(i)["id"] for i in r.text.splitlines()]
+    assert mine.id in ids
+    assert theirs.id not in ids
+    assert ids == sorted(ids)
+
+
+def test_batch_marks_missing(
+    client: TestClient, normal_user_token_headers: Dict[str, str], db: Session
+) -> None:
+    user = crud.user.get_by_email(db, email=settings.EMAIL_TEST_USER)
+    mine = create_random_ordinals(db, owner_id=user.id)
+    theirs = create_random_ordinals(db, owner_id=create_random_user(db).id)
+    missing = theirs.id + 1000000
+    r = client.get(
+        f"{ORDINALS}/batch",
+        params={"ids": [missing, theirs.id, mine.id]},
+        headers=normal_user_token_headers,
+    )
+    assert r.status_code == 200
+    results = r.json()
+    assert [(i["id"], i["status"]) for i in results] == [
+        (missing, "not found"),
+        (theirs.id, "not enough permissions"),
+        (mine.id, "found"),
+    ]
+    assert results[0]["item"] is None
+    assert results[2]["item"]["content"] == mine.content
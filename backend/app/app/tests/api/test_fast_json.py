@@ -0,0 +1,18 @@
+from types import SimpleNamespace
+
+from app import schemas
+from app.api.fast_json import orm_data
+
+
+def test_orm_data_matches_schema() -> None:
+    ordinals = SimpleNamespace(id=1, content=["primo"], language="la", version=1)
+    template = SimpleNamespace(
+        id=2,
+        content="{{ ordinals[0] }}",
+        language="la",
+        ordinals_id=1,
+        ordinals=ordinals,
+        owner_id=None,
+    )
+    data = orm_data(template, schemas.OldDateTemplate)
+    assert data == schemas.OldDateTemplate.from_orm(template).dict()
@@ -0,0 +1,65 @@
+from datetime import date, timedelta
+
+from sqlalchemy.orm import Session
+
+from app import crud
+from app.tests.utils.utils import random_lower_string
+
+
+def test_replace_year(db: Session) -> None:
+    calendar = random_lower_string()
+    datestrs = ["Easter", "12 Apr", "1 Jan"]
+    dates = [date(2020, 4, 12), date(2020, 4, 12), date(2020, 1, 1)]
+    crud.calendar_date.replace_year(
+        db, calendar=calendar, year=2020, datestrs=datestrs, dates=dates
+    )
+    assert crud.calendar_date.is_materialised(db, calendar=calendar, year=2020)
+    assert not crud.calendar_date.is_materialised(db, calendar=calendar, year=2021)
+    assert crud.calendar_date.get_years(db, calendar=calendar) == [2020]
+    # replacing again must not duplicate rows
+    crud.calendar_date.replace_year(
+        db, calendar=calendar, year=2020, datestrs=datestrs, dates=dates
+    )
+    mapping = crud.calendar_date.get_mapping(db, calendar=calendar, year=2020)
+    assert mapping == {
+        date(2020, 1, 1): ["1 Jan"],
+        date(2020, 4, 12): ["Easter", "12 Apr"],
+    }
+
+
+def test_replace_datestrs(db: Session) -> None:
+    calendar = random_lower_string()
+    crud.calendar_date.replace_year(
+        db,
+        calendar=calendar,
+        year=2020,
+        datestrs=["Easter", "1 Jan"],
+        dates=[date(2020, 4, 12), date(2020, 1, 1)],
+    )
+    crud.calendar_date.replace_datestrs(
+        db,
+        calendar=calendar,
+        year=2020,
+        datestrs=["1 Jan", "Easter"],
+        resolved={"1 Jan": date(2020, 1, 2)},
+    )
+    mapping = crud.calendar_date.get_mapping(db, calendar=calendar, year=2020)
+    assert mapping == {date(2020, 1, 2): ["1 Jan"]}
+
+
+def test_touch_calendar_year(db: Session) -> None:
+    calendar = random_lower_string()
+    max_age = timedelta(hours=1)
+    assert not crud.calendar_year.is_fresh(
+        db, calendar=calendar, year=2020, max_age=max_age
+    )
+    crud.calendar_year.touch(db, calendar=calendar, year=2020)
+    assert crud.calendar_year.is_fresh(
+        db, calendar=calendar, year=2020, max_age=max_age
+    )
+    assert not crud.calendar_year.is_fresh(
+        db, calendar=calendar, year=2021, max_age=max_age
+    )
+    crud.calendar_year.touch(db, calendar=calendar, year=2020)
+    rows = [i for i in crud.calendar_year.get_all(db) if i.calendar == calendar]
+    assert [i.year for i in rows] == [2020]
@@ -1,7 +1,11 @@
+import pytest
+from sqlalchemy import inspect
 from sqlalchemy.orm import Session
 
 from app import crud
+from app.crud.filters import FilterError
 from app.schemas.item import ItemCreate, ItemUpdate
+from app.tests.utils.item import create_random_item
 from app.tests.utils.user import create_random_user
 from app.tests.utils.utils import random_lower_string
 
@@ -59,3 +63,92 @@ def test_delete_item(db: Session) -> None:
     assert item2.title == title
     assert item2.description == description
     assert item2.owner_id == user.id
+
+
+def test_get_multi_after(db: Session) -> None:
+    user = create_random_user(db)
+    items = [create_random_item(db, owner_id=user.id) for _ in range(3)]
+    page = crud.item.get_multi(db, after=items[0].id, limit=2)
+    assert [i.id for i in page] == [i.id for i in items[1:]]
+    assert crud.item.get_multi(db, after=items[-1].id) == []
+
+
+def test_get_multi_fields(db: Session) -> None:
+    item = create_random_item(db)
+    db.expire_all()
+    (loaded,) = crud.item.get_multi(
+        db, after=item.id - 1, limit=1, fields=["title", "unknown"]
+    )
+    assert loaded.title == item.title
+    assert "description" in inspect(loaded).unloaded
+
+
+def test_get_multi_filters(db: Session) -> None:
+    items = [create_random_item(db) for _ in range(3)]
+    titles = [items[0].title, items[2].title]
+    found = crud.item.get_multi(db, filters=[{"title": {"in": titles}}])
+    assert [i.id for i in found] == [items[0].id, items[2].id]
+    prefix = {"title": {"prefix": items[1].title[:-1]}}
+    assert items[1] in crud.item.get_multi(db, filters=[prefix])
+    with pytest.raises(FilterError):
+        crud.item.get_multi(db, filters=[{"owner_id": items[0].owner_id}])
+    with pytest.raises(FilterError):
+        crud.item.get_multi(db, filters=[{"id": {"range": ["abc", None]}}])
+    assert crud.item.get_multi(db, filters=[{"id": str(items[0].id)}]) == [items[0]]
+
+
+def test_iterate(db: Session) -> None:
+    user = create_random_user(db)
+    items = [create_random_item(db, owner_id=user.id) for _ in range(3)]
+    found = crud.item.iterate(db, owner_id=user.id, batch_size=2)
+    assert [i.id for i in found] == [i.id for i in items]
+
+
+def test_get_multi_by_ids(db: Session) -> None:
+    items = [create_random_item(db) for _ in range(2)]
+    found = crud.item.get_multi_by_ids(db, ids=[i.id for i in items], eager=True)
+    assert {i.id for i in found} == {i.id for i in items}
+
+
+def test_create_multi(db: Session) -> None:
+    user = create_random_user(db)
+    items_in = [
+        ItemCreate(title=random_lower_string(), description=random_lower_string())
+        for _ in range(3)
+    ]
+    items = crud.item.create_multi(db, objs_in=items_in, owner_id=user.id)
+    assert [i.title for i in items] == [i.title for i in items_in]
+    assert all(i.owner_id == user.id for i in items)
+    assert crud.item.create_multi(db, objs_in=[]) == []
+
+
+def test_update_and_remove_multi(db: Session) -> None:
+    user = create_random_user(db)
+    items = [create_random_item(db, owner_id=user.id) for _ in range(3)]
+    ids = [i.id for i in items]
+    title = random_lower_string()
+    assert crud.item.update_multi(db, ids=ids[:2], obj_in={"title": title}) == 2
+    titles = {i.id: i.title for i in crud.item.get_multi_by_ids(db, ids=ids)}
+    assert titles[ids[0]] == titles[ids[1]] == title
+    assert titles[ids[2]] == items[2].title
+    assert crud.item.update_multi(db, ids=ids[:2], obj_in={"id": ids[2]}) == 0
+    assert crud.item.remove_multi(db, ids=ids) == 3
+    assert crud.item.get_multi_by_ids(db, ids=ids) == []
+
+
+def test_patch_item(db: Session) -> None:
+    item = create_random_item(db)
+    title = random_lower_string()
+    patched = crud.item.patch(db, id=item.id, obj_in={"title": title})
+    assert patched["title"] == title
+    assert patched["description"] == item.description
+    assert crud.item.get_summary(db, id=item.id)["title"] == title
+    assert crud.item.patch(db, id=item.id, obj_in={"title": "x"}, owner_id=-1) is None
+    assert crud.item.patch(db, id=-1, obj_in={"title": "x"}) is None
+
+
+def test_patch_keeps_primary_key(db: Session) -> None:
+    item = create_random_item(db)
+    patched = crud.item.patch(db, id=item.id, obj_in={"id": item.id + 1000})
+    assert patched["id"] == item.id
+    assert crud.item.get_summary(db, id=item.id) is not None
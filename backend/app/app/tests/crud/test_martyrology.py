@@ -0,0 +1,19 @@
+from sqlalchemy.orm import Session
+
+from app import crud
+from app.models.martyrology import Ordinals
+
+
+def test_updates_bump_version(db: Session) -> None:
+    ordinals = Ordinals(content=["primo"], language="la")
+    db.add(ordinals)
+    db.commit()
+    db.refresh(ordinals)
+    assert ordinals.version == 1
+    ordinals = crud.ordinals.update(db, db_obj=ordinals, obj_in={"language": "en"})
+    assert ordinals.version == 2
+    patched = crud.ordinals.patch(db, id=ordinals.id, obj_in={"language": "la"})
+    assert patched["version"] == 3
+    assert crud.ordinals.update_multi(db, ids=[ordinals.id], obj_in={"content": []})
+    db.refresh(ordinals)
+    assert ordinals.version == 4
@@ -0,0 +1,29 @@
+from sqlalchemy.orm import Session
+
+from app import crud
+from app.tests.utils.utils import random_lower_string
+
+
+def test_record_task_metrics(db: Session) -> None:
+    name = random_lower_string()
+    crud.task_metric.record(
+        db, metrics={name: {"count": 2, "runtime_seconds": 3.0, "runtime_max": 2.0}},
+    )
+    crud.task_metric.record(
+        db,
+        metrics={
+            name: {
+                "count": 1,
+                "failures": 1,
+                "runtime_seconds": 1.0,
+                "runtime_max": 1.0,
+            }
+        },
+    )
+    metric = next(i for i in crud.task_metric.get_all(db) if i.name == name)
+    db.refresh(metric)
+    assert metric.count == 3
+    assert metric.failures == 1
+    assert metric.runtime_max == 2.0
+    assert metric.mean_runtime == 4.0 / 3
+    assert metric.mean_wait == 0.0
@@ -0,0 +1,32 @@
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from app.models.martyrology import OldDateTemplate, Ordinals
+from app.tests.utils.utils import random_lower_string
+
+
+def create_random_ordinals(db: Session, *, owner_id: Optional[int] = None) -> Ordinals:
+    ordinals = Ordinals(
+        content=[random_lower_string()], language="la", owner_id=owner_id
+    )
+    db.add(ordinals)
+    db.commit()
+    db.refresh(ordinals)
+    return ordinals
+
+
+def create_random_old_date_template(
+    db: Session, *, owner_id: Optional[int] = None
+) -> OldDateTemplate:
+    ordinals = create_random_ordinals(db, owner_id=owner_id)
+    template = OldDateTemplate(
+        content="{{ ordinals[0] }}",
+        language="la",
+        ordinals_id=ordinals.id,
+        owner_id=owner_id,
+    )
+    db.add(template)
+    db.commit()
+    db.refresh(template)
+    return template
@@ -1,7 +1,8 @@
 import logging
 from datetime import datetime, timedelta
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Union
 
 import emails
 from emails.template import JinjaTemplate
@@ -14,16 +15,29 @@ class EmailException(Exception):
     pass
 
 
+@lru_cache()
+def get_email_template(name: str) -> JinjaTemplate:
+    """
+    Load a template from `EMAIL_TEMPLATES_DIR` once per process.
+
+    The template compiles when first rendered and is reused thereafter.
+    """
+    with open(Path(settings.EMAIL_TEMPLATES_DIR) / name) as f:
+        return JinjaTemplate(f.read())
+
+
 def send_email(
     email_to: str,
     subject_template: str = "",
-    html_template: str = "",
+    html_template: Union[str, JinjaTemplate] = "",
     environment: Dict[str, Any] = {},
 ) -> None:
     assert settings.EMAILS_ENABLED, "no provided configuration for email variables"
+    if isinstance(html_template, str):
+        html_template = JinjaTemplate(html_template)
     message = emails.Message(
         subject=JinjaTemplate(subject_template),
-        html=JinjaTemplate(html_template),
+        html=html_template,
         mail_from=(settings.EMAILS_FROM_NAME, settings.EMAILS_FROM_EMAIL),
     )
     smtp_options = {"host": settings.SMTP_HOST, "port": settings.SMTP_PORT}
@@ -42,12 +56,10 @@ def send_email(
 def send_test_email(email_to: str) -> None:
     project_name = settings.PROJECT_NAME
     subject = f"{project_name} - Test email"
-    with open(Path(settings.EMAIL_TEMPLATES_DIR) / "test_email.html") as f:
-        template_str = f.read()
     send_email(
         email_to=email_to,
         subject_template=subject,
-        html_template=template_str,
+        html_template=get_email_template("test_email.html"),
         environment={"project_name": settings.PROJECT_NAME, "email": email_to},
     )
 
@@ -55,14 +67,12 @@ def send_test_email(email_to: str) -> None:
 def send_reset_password_email(email_to: str, email: str, token: str) -> None:
     project_name = settings.PROJECT_NAME
     subject = f"{project_name} - Password recovery for user {email}"
-    with open(Path(settings.EMAIL_TEMPLATES_DIR) / "reset_password.html") as f:
-        template_str = f.read()
     server_host = settings.SERVER_HOST
     link = f"{server_host}/reset-password?token={token}"
     send_email(
         email_to=email_to,
         subject_template=subject,
-        html_template=template_str,
+        html_template=get_email_template("reset_password.html"),
         environment={
             "project_name": settings.PROJECT_NAME,
             "username": email,
@@ -73,21 +83,19 @@ def send_reset_password_email(email_to: str, email: str, token: str) -> None:
     )
 
 
-def send_new_account_email(email_to: str, username: str, password: str) -> None:
+def send_new_account_email(email_to: str, username: str, token: str) -> None:
     project_name = settings.PROJECT_NAME
     subject = f"{project_name} - New account for user {username}"
-    with open(Path(settings.EMAIL_TEMPLATES_DIR) / "new_account.html") as f:
-        template_str = f.read()
-    link = settings.SERVER_HOST
+    link = f"{settings.SERVER_HOST}/reset-password?token={token}"
     send_email(
         email_to=email_to,
         subject_template=subject,
-        html_template=template_str,
+        html_template=get_email_template("new_account.html"),
         environment={
             "project_name": settings.PROJECT_NAME,
             "username": username,
-            "password": password,
             "email": email_to,
+            "valid_hours": settings.EMAIL_RESET_TOKEN_EXPIRE_HOURS,
             "link": link,
         },
     )
@@ -109,6 +117,6 @@ def generate_password_reset_token(email: str) -> str:
 def verify_password_reset_token(token: str) -> Optional[str]:
     try:
         decoded_token = jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"])
-        return decoded_token["email"]
+        return decoded_token["sub"]
     except jwt.JWTError:
         return None
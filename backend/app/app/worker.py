@@ -1,14 +1,63 @@
-from datetime import date
-from typing import List
+import json
+from datetime import date, datetime, timedelta
+from hashlib import sha256
+from typing import Any, Dict, List, Tuple
 
-from celery import group
+from celery import Task, chord, states
+from celery.signals import worker_process_init
+from celery.result import AsyncResult
+from celery.utils.log import get_task_logger
 from raven import Client
+from sqlalchemy.orm import Session
 
-from app.core.celery_app import celery_app
+from app import crud, utils
+from app.core.celery_app import bulk, celery_app, interactive
 from app.core.config import settings
-from app.DSL import dsl_parser
+from app.core.execution import execution
+from app.db.session import SessionLocal, engine
+from app.DSL import (
+    DSL_VERSION,
+    PACKED_FORMAT,
+    gen_ordo,
+    pack_dates,
+    resolve,
+    unpack_dates,
+    warm,
+)
+from app.models.office_parts import calendar_overrides, valid_calendars
 
-client_sentry = Client(settings.SENTRY_DSN)
+client_sentry = None
+logger = get_task_logger(__name__)
+
+
+@worker_process_init.connect
+def warm_worker_process(**kwargs: Any) -> None:
+    """
+    Prepare a freshly forked worker process before it takes any tasks.
+
+    Builds the grammar and resolves every stored datestr over the
+    calendar horizon, so the first tasks don't pay for it.
+    """
+    global client_sentry
+    client_sentry = Client(settings.SENTRY_DSN)
+    # connections inherited from the parent must not be shared
+    engine.dispose()
+    db = SessionLocal()
+    try:
+        datestrs = crud.martyrology.get_datestrs(db)
+    finally:
+        db.close()
+    this_year = date.today().year
+    years = range(this_year, this_year + settings.CALENDAR_HORIZON_YEARS + 1)
+    start = datetime.now()
+    failures = warm(datestrs, years)
+    logger.info(
+        "Warmed %d datestrs over %d years in %s (%d failed)",
+        len(datestrs),
+        len(years),
+        datetime.now() - start,
+        failures,
+    )
 
 
 @celery_app.task(acks_late=True)
@@ -16,17 +65,479 @@ def test_celery(word: str) -> str:
     return f"test task return {word}"
 
 
-@celery_app.task()
+# SMTP failures are usually transient, so retry them with backoff
+email_task = dict(
+    acks_late=True,
+    autoretry_for=(utils.EmailException, OSError),
+    retry_backoff=True,
+    retry_kwargs={"max_retries": 5},
+)
+
+
+# Resolution tasks are stopped if they overrun: at the soft limit they
+# raise SoftTimeLimitExceeded, so they can record the failure
+resolve_limits = dict(
+    soft_time_limit=settings.RESOLVE_SOFT_TIME_LIMIT,
+    time_limit=settings.RESOLVE_TIME_LIMIT,
+)
+block_limits = dict(
+    soft_time_limit=settings.BLOCK_SOFT_TIME_LIMIT, time_limit=settings.BLOCK_TIME_LIMIT
+)
+
+
+@celery_app.task(**email_task)
+def send_test_email(email_to: str) -> None:
+    utils.send_test_email(email_to=email_to)
+
+
+def get_user_email(user_id: int) -> str:
+    """Look up a user's email, so it needn't travel through the broker."""
+    db = SessionLocal()
+    try:
+        return crud.user.get(db, id=user_id).email
+    finally:
+        db.close()
+
+
+@celery_app.task(**email_task)
+def send_reset_password_email(user_id: int, token: str) -> None:
+    email = get_user_email(user_id)
+    utils.send_reset_password_email(email_to=email, email=email, token=token)
+
+
+@celery_app.task(**email_task)
+def send_new_account_email(user_id: int, token: str) -> None:
+    """Welcome a new user with a link to set their password."""
+    email = get_user_email(user_id)
+    utils.send_new_account_email(email_to=email, username=email, token=token)
+
+
+@celery_app.task(**resolve_limits)
 def resolve_datestr(datestr: str, year: int) -> date:
-    return dsl_parser(datestr, year)
+    return resolve(datestr, year)
+
+
+def chunk(items: List[Any], size: int) -> List[List[Any]]:
+    """Split a list into consecutive chunks of at most `size` items."""
+    return [items[i : i + size] for i in range(0, len(items), size)]
+
+
+@celery_app.task(**resolve_limits)
+def linear_resolve_datestrs(datestrs, year, packed=True):
+    resolved = [resolve(i, year) for i in datestrs]
+    return pack_dates(resolved) if packed else resolved
+
+
+@celery_app.task(**resolve_limits)
+def resolve_calendars(datestrs: List[str], year: int) -> Dict[str, Any]:
+    """Resolve datestrs for a year in every valid calendar in one pass."""
+    ordo, stats = gen_ordo(datestrs, year, valid_calendars, calendar_overrides)
+    for calendar, i in stats.items():
+        logger.info(
+            f"{calendar}/{year}: {i['entries']} entries in {i['seconds']:.3f}s "
+            f"({i['per_second']:.0f}/s)"
+        )
+    return {"datestrs": datestrs, "dates": pack_ordo(ordo), "stats": stats}
+
+
+def pack_ordo(ordo: Dict[str, List[date]]) -> Dict[str, str]:
+    """Pack the dates of each calendar for storage in the result backend."""
+    return {calendar: pack_dates(dates) for calendar, dates in ordo.items()}
+
+
+def resolution_key(datestrs: List[str], year: int) -> str:
+    """
+    Key a resolution by everything which determines its result.
+
+    The datestrs are treated as a set, so any ordering shares a key.
+    """
+    payload = json.dumps(
+        [DSL_VERSION, PACKED_FORMAT, year, sorted(set(datestrs)), calendar_overrides],
+        sort_keys=True,
+    )
+    return f"ordo-{sha256(payload.encode()).hexdigest()}"
+
+
+# states of a resolution which has been queued but has no result yet
+IN_FLIGHT = (states.RECEIVED, states.STARTED)
+
+
+def is_in_flight(result: AsyncResult, limit: timedelta) -> bool:
+    """
+    Check whether a task is queued or running.
+
+    One which has been in flight for longer than `limit` is taken to be
+    lost, e.g. with the worker running it.
+    """
+    if result.state not in IN_FLIGHT:
+        return False
+    since = result.date_done
+    if isinstance(since, str):
+        since = datetime.fromisoformat(since)
+    return since is not None and datetime.utcnow() - since < limit
+
+
+def send_resolve_calendars(datestrs: List[str], year: int) -> AsyncResult:
+    """
+    Queue `resolve_calendars` unless the same resolution is stored or running.
+
+    The task id is the resolution key, so a repeat request just finds the
+    stored result without using a worker.  The resolution is marked received
+    before it is queued, so repeats sent before a worker picks it up don't
+    queue it again, and marked failed if it cannot be queued.  The datestrs
+    are sent sorted and deduplicated.
+    """
+    datestrs = sorted(set(datestrs))
+    result = celery_app.AsyncResult(resolution_key(datestrs, year))
+    limit = timedelta(seconds=settings.RESOLVE_TIME_LIMIT)
+    if result.state != states.SUCCESS and not is_in_flight(result, limit):
+        celery_app.backend.store_result(result.id, None, states.RECEIVED)
+        try:
+            execution.submit(
+                "app.worker.resolve_calendars", args=[datestrs, year], task_id=result.id
+            )
+        except Exception as e:
+            celery_app.backend.mark_as_failure(result.id, e)
+            raise
+    return result
+
+
+def memoised_ordo(
+    datestrs: List[str], year: int
+) -> Tuple[Dict[str, List[date]], Dict[str, Dict[str, float]]]:
+    """
+    Resolve datestrs in every valid calendar, sharing stored resolutions.
+
+    A resolution computed here is stored just as if `resolve_calendars` had
+    run, so tasks and API requests share each other's results.  One still in
+    flight is recomputed rather than waited for, since waiting in a task
+    could tie up every process of a queue.
+    """
+    unique = sorted(set(datestrs))
+    key = resolution_key(unique, year)
+    cached = celery_app.AsyncResult(key)
+    if cached.state == states.SUCCESS:
+        ordo = {k: unpack_dates(v) for k, v in cached.result["dates"].items()}
+        stats = cached.result["stats"]
+    else:
+        ordo, stats = gen_ordo(unique, year, valid_calendars, calendar_overrides)
+        celery_app.backend.store_result(
+            key,
+            {"datestrs": unique, "dates": pack_ordo(ordo), "stats": stats},
+            "SUCCESS",
+        )
+    index = {j: i for i, j in enumerate(unique)}
+    return (
+        {k: [v[index[i]] for i in datestrs] for k, v in ordo.items()},
+        stats,
+    )
+
+
+def render_old_dates(
+    entries: List[Any], year: int, resolved: Dict[str, date]
+) -> Dict[int, str]:
+    """Render old dates for martyrology entries from resolved datestrs."""
+    rendered = {}
+    for entry in entries:
+        if entry.datestr in resolved:
+            entry.render_old_date(year, resolved[entry.datestr])
+            rendered[entry.id] = entry.old_date
+    return rendered
+
+
+def materialise(db: Session, year: int) -> Dict[str, Dict[str, float]]:
+    """Resolve, render and store a year in every valid calendar, uncommitted."""
+    datestrs = crud.martyrology.get_datestrs(db)
+    entries = crud.martyrology.get_for_rendering(db)
+    ordo, stats = memoised_ordo(datestrs, year)
+    for calendar, dates in ordo.items():
+        crud.calendar_date.replace_year(
+            db,
+            calendar=calendar,
+            year=year,
+            datestrs=datestrs,
+            dates=dates,
+            commit=False,
+        )
+        crud.rendered_old_date.replace(
+            db,
+            calendar=calendar,
+            year=year,
+            rendered=render_old_dates(entries, year, dict(zip(datestrs, dates))),
+            commit=False,
+        )
+        crud.calendar_year.touch(db, calendar=calendar, year=year, commit=False)
+    return stats
+
+
+def materialise_task_id(year: int) -> str:
+    """Task id of the materialisation of a year, so it is only queued once."""
+    return f"materialise-{year}"
+
+
+@celery_app.task(**block_limits)
+def materialise_year(year: int) -> Dict[str, Dict[str, float]]:
+    """Resolve, render and store a year in every valid calendar."""
+    db = SessionLocal()
+    try:
+        stats = materialise(db, year)
+        db.commit()
+    finally:
+        db.close()
+    return stats
+
+
+def plan_calendar_job(job_id: str) -> Tuple[List[Tuple[List[int], List[str]]], int]:
+    """
+    Start a calendar job by sharding it into blocks.
+
+    The (years, datestrs) matrix is sharded into blocks to be resolved by
+    `resolve_block` and merged into storage by `merge_blocks`.  A job with
+    nothing to do is finished at once.
+
+    Returns
+    -------
+    Tuple[List[Tuple[List[int], List[str]]], int]
+        The blocks, and the number of years in the job.
+    """
+    db = SessionLocal()
+    try:
+        job = crud.calendar_job.get(db, id=job_id)
+        years = list(range(job.first_year, job.last_year + 1))
+        datestrs = crud.martyrology.get_datestrs(db)
+        blocks = [
+            (i, j)
+            for i in chunk(years, settings.CALENDAR_SHARD_YEARS)
+            for j in chunk(datestrs, settings.RESOLVE_CHUNK_SIZE)
+        ]
+        if not crud.calendar_job.start(db, id=job_id, total=len(blocks)):
+            # revoked before it started
+            blocks = []
+        elif not blocks:
+            crud.calendar_job.finish(db, id=job_id, result={"resolutions": 0})
+    finally:
+        db.close()
+    return blocks, len(years)
+
+
+def block_task_id(job_id: str, block: int) -> str:
+    """Task id of a block of a calendar job, so it can be revoked."""
+    return f"{job_id}-{block}"
+
+
+@celery_app.task(bind=True, acks_late=True)
+def calendar_job(self: Task, job_id: str) -> None:
+    """Materialise the years of a calendar job across every worker."""
+    blocks, years = plan_calendar_job(job_id)
+    if not blocks:
+        return None
+    route = interactive if years <= settings.INTERACTIVE_MAX_YEARS else bulk
+    return self.replace(
+        chord(
+            (
+                resolve_block.s(job_id, i, j).set(
+                    task_id=block_task_id(job_id, n), **route
+                )
+                for n, (i, j) in enumerate(blocks)
+            ),
+            merge_blocks.s(job_id).set(**route),
+        )
+    )
+
+
+@celery_app.task(**block_limits)
+def resolve_block(job_id: str, years: List[int], datestrs: List[str]) -> Dict:
+    """Resolve and render one block of a calendar job."""
+    db = SessionLocal()
+    try:
+        if crud.calendar_job.get(db, id=job_id).status == "REVOKED":
+            return {"datestrs": [], "years": {}}
+        try:
+            entries = crud.martyrology.get_for_rendering(db, datestrs=datestrs)
+            resolved = {}
+            for year in years:
+                ordo, _ = memoised_ordo(datestrs, year)
+                resolved[year] = {
+                    calendar: {
+                        "dates": pack_dates(dates),
+                        "rendered": render_old_dates(
+                            entries, year, dict(zip(datestrs, dates))
+                        ),
+                    }
+                    for calendar, dates in ordo.items()
+                }
+        except Exception as e:
+            crud.calendar_job.advance(db, id=job_id, done=0, errors=1)
+            crud.calendar_job.finish(db, id=job_id, error=repr(e))
+            raise
+        crud.calendar_job.advance(
+            db, id=job_id, resolved=len(years) * len(datestrs) * len(valid_calendars)
+        )
+    finally:
+        db.close()
+    return {"datestrs": datestrs, "years": resolved}
+
+
+@celery_app.task(**block_limits)
+def merge_blocks(blocks: List[Dict], job_id: str) -> Dict[str, float]:
+    """Merge the blocks of a calendar job into storage and report throughput."""
+    db = SessionLocal()
+    try:
+        revoked = crud.calendar_job.get(db, id=job_id).status == "REVOKED"
+    finally:
+        db.close()
+    if revoked:
+        return {}
+    merged: Dict[Tuple[int, str], Tuple[List[str], List[date], Dict[int, str]]] = {}
+    for block in blocks:
+        for year, calendars in block["years"].items():
+            for calendar, resolved in calendars.items():
+                datestrs, dates, rendered = merged.setdefault(
+                    (int(year), calendar), ([], [], {})
+                )
+                datestrs += block["datestrs"]
+                dates += unpack_dates(resolved["dates"])
+                rendered.update((int(k), v) for k, v in resolved["rendered"].items())
+
+    db = SessionLocal()
+    try:
+        for (year, calendar), (datestrs, dates, rendered) in sorted(merged.items()):
+            crud.calendar_date.replace_year(
+                db,
+                calendar=calendar,
+                year=year,
+                datestrs=datestrs,
+                dates=dates,
+                commit=False,
+            )
+            crud.rendered_old_date.replace(
+                db, calendar=calendar, year=year, rendered=rendered, commit=False
+            )
+            crud.calendar_year.touch(db, calendar=calendar, year=year, commit=False)
+        db.commit()
+
+        job = crud.calendar_job.get(db, id=job_id)
+        seconds = (datetime.utcnow() - job.started_at).total_seconds()
+        resolutions = sum(len(i) for _, i, _ in merged.values())
+        result = {
+            "blocks": len(blocks),
+            "resolutions": resolutions,
+            "seconds": seconds,
+            "per_second": resolutions / seconds if seconds else 0.0,
+        }
+        crud.calendar_job.finish(db, id=job_id, result=result)
+    finally:
+        db.close()
+    return result
+
+
+@celery_app.task(**block_limits)
+def update_datestrs(datestrs: List[str]) -> None:
+    """
+    Re-resolve changed datestrs across the materialised horizon.
+
+    Only the rows and rendered old dates for these datestrs are touched.
+    Datestrs no longer used by any entry are dropped.
+    """
+    db = SessionLocal()
+    try:
+        live = crud.martyrology.get_datestrs(db, datestrs=datestrs)
+        entries = crud.martyrology.get_for_rendering(db, datestrs=datestrs)
+        horizon: Dict[int, List[str]] = {}
+        for calendar in valid_calendars:
+            for year in crud.calendar_date.get_years(db, calendar=calendar):
+                horizon.setdefault(year, []).append(calendar)
+        for year, calendars in sorted(horizon.items()):
+            ordo, _ = gen_ordo(live, year, calendars, calendar_overrides)
+            for calendar, dates in ordo.items():
+                resolved = dict(zip(live, dates))
+                crud.calendar_date.replace_datestrs(
+                    db,
+                    calendar=calendar,
+                    year=year,
+                    datestrs=datestrs,
+                    resolved=resolved,
+                    commit=False,
+                )
+                rendered = render_old_dates(entries, year, resolved)
+                crud.rendered_old_date.replace(
+                    db,
+                    calendar=calendar,
+                    year=year,
+                    rendered=rendered,
+                    martyrology_ids=[i.id for i in entries],
+                    commit=False,
+                )
+        db.commit()
+    finally:
+        db.close()
 
 
 @celery_app.task()
-def resolve_datestrs(datestrs: List[str], year: int) -> List[date]:
-    return group((linear_resolve_datestrs.s(i, year) for i in datestrs))()
+def refresh_horizon() -> List[int]:
+    """
+    Queue materialisation of every stale year in the rolling horizon.
+
+    Returns the years queued, leaving out those already in flight.
+    """
+    first = date.today().year
+    years = range(first, first + settings.CALENDAR_HORIZON_YEARS + 1)
+    max_age = timedelta(hours=settings.CALENDAR_MAX_AGE_HOURS)
+    db = SessionLocal()
+    try:
+        stale = [
+            year
+            for year in years
+            if not all(
+                crud.calendar_year.is_fresh(
+                    db, calendar=calendar, year=year, max_age=max_age
+                )
+                for calendar in valid_calendars
+            )
+        ]
+    finally:
+        db.close()
+    # a year still being materialised from the last refresh is left alone,
+    # unless it has been in flight for longer than a year may be stale
+    queued = []
+    for year in stale:
+        result = celery_app.AsyncResult(materialise_task_id(year))
+        if is_in_flight(result, max_age):
+            continue
+        celery_app.backend.store_result(result.id, None, states.RECEIVED)
+        materialise_year.apply_async(args=[year], task_id=result.id)
+        queued.append(year)
+    return queued
 
 
 @celery_app.task()
-def linear_resolve_datestrs(datestrs, year):
-    resolved = [dsl_parser(i, year) for i in datestrs]
-    return resolved
+def reap_calendar_jobs() -> List[str]:
+    """
+    Revoke calendar jobs which nobody is waiting for.
+
+    A job is abandoned if nobody has polled or watched it for
+    `CALENDAR_JOB_ABANDON_MINUTES`, and unneeded if every year it covers
+    has been refreshed in every calendar since it was created.
+    """
+    now = datetime.utcnow()
+    abandoned = now - timedelta(minutes=settings.CALENDAR_JOB_ABANDON_MINUTES)
+    db = SessionLocal()
+    try:
+        reaped = []
+        for job in crud.calendar_job.get_unfinished(db):
+            unneeded = all(
+                crud.calendar_year.is_fresh(
+                    db, calendar=calendar, year=year, max_age=now - job.created_at
+                )
+                for year in range(job.first_year, job.last_year + 1)
+                for calendar in valid_calendars
+            )
+            if (job.last_polled_at or job.created_at) < abandoned or unneeded:
+                if crud.calendar_job.revoke(db, id=job.id):
+                    execution.revoke_calendar_job(job.id, job.total or 0)
+                    reaped.append(job.id)
+    finally:
+        db.close()
+    for id in reaped:
+        logger.info(f"Reaped calendar job {id}")
+    return reaped
@@ -0,0 +1,144 @@
+import json
+from datetime import date
+from time import perf_counter, process_time
+from typing import Any, Callable, Tuple
+
+import orjson
+import typer
+from fastapi.encoders import jsonable_encoder
+from kombu.serialization import dumps, loads
+
+from app import crud, schemas
+from app.api.fast_json import orm_data
+from app.core.celery_app import celery_app
+from app.db.session import SessionLocal
+from app.DSL import pack_dates, resolve, unpack_dates
+
+
+app = typer.Typer()
+
+
+def timed(fn: Callable[[], Any], repeat: int) -> Tuple[Any, float]:
+    """Run a function `repeat` times, returning its result and mean time."""
+    start = perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return result, (perf_counter() - start) / repeat
+
+
+@app.command()
+def benchmark_payloads(
+    years: int = 10, repeat: int = 5, live: bool = False, timeout: float = 60,
+):
+    """
+    Compare result payloads for resolved datestrs.
+
+    Resolves every stored datestr over a number of years and measures the
+    serialised size, encoding time and decoding time of plain lists of dates
+    against packed ordinals, with and without compression.
+
+    Parameters
+    ----------
+
+    years: int : Number of years to resolve, from this year.
+
+    repeat: int : Runs to average over.
+
+    live: bool : Also time `linear_resolve_datestrs` end to end through
+        the broker, which needs a running worker.
+
+    timeout: float : Seconds to wait for each live result.
+    """
+    db = SessionLocal()
+    try:
+        datestrs = crud.martyrology.get_datestrs(db)
+    finally:
+        db.close()
+    this_year = date.today().year
+    dates = [
+        resolve(i, year)
+        for year in range(this_year, this_year + years)
+        for i in datestrs
+    ]
+    print(f"{len(datestrs)} datestrs over {years} years: {len(dates)} dates.")
+
+    formats = {
+        "list": (lambda: dates, lambda payload: payload),
+        "packed": (lambda: pack_dates(dates, False), unpack_dates),
+        "compressed": (lambda: pack_dates(dates, True), unpack_dates),
+    }
+    # measured with the serializer results actually travel in
+    serializer = celery_app.conf.result_serializer
+    print(f"{'format':<12}{'bytes':>12}{'encode ms':>12}{'decode ms':>12}")
+    for name, (encode, decode) in formats.items():
+        (content_type, encoding, payload), encode_time = timed(
+            lambda: dumps(encode(), serializer=serializer), repeat
+        )
+        _, decode_time = timed(
+            lambda: sum(1 for _ in decode(loads(payload, content_type, encoding))),
+            repeat,
+        )
+        print(
+            f"{name:<12}{len(payload):>12}"
+            f"{encode_time * 1e3:>12.2f}{decode_time * 1e3:>12.2f}"
+        )
+
+    if not live:
+        return
+    print(f"\n{'format':<12}{'round trip ms':>16}")
+    for name, packed in (("list", False), ("packed", True)):
+
+        def round_trip():
+            result = celery_app.send_task(
+                "app.worker.linear_resolve_datestrs",
+                args=[datestrs, this_year],
+                kwargs={"packed": packed},
+            ).get(timeout=timeout)
+            return sum(1 for _ in (unpack_dates(result) if packed else result))
+
+        _, seconds = timed(round_trip, repeat)
+        print(f"{name:<12}{seconds * 1e3:>16.2f}")
+
+
+@app.command()
+def benchmark_serialisation(limit: int = 100, repeat: int = 20):
+    """
+    Compare validated and fast serialisation of a page of martyrology.
+
+    Times what the list endpoint does with a page of rows: validating them
+    through the response schema and encoding them with the default
+    encoder, against copying them with `orm_data()` and encoding them with
+    orjson.  Reports wall and CPU time per page.
+
+    Parameters
+    ----------
+
+    limit: int : Rows in the page.
+
+    repeat: int : Runs to average over.
+    """
+    db = SessionLocal()
+    try:
+        items = crud.martyrology.get_multi(db, limit=limit)
+        schema = schemas.Martyrology
+
+        def validated():
+            content = jsonable_encoder([schema.from_orm(i) for i in items])
+            return json.dumps(content).encode()
+
+        def fast():
+            return orjson.dumps([orm_data(i, schema) for i in items])
+
+        print(f"{len(items)} rows.")
+        print(f"{'path':<12}{'bytes':>12}{'wall ms':>12}{'cpu ms':>12}")
+        for name, fn in (("validated", validated), ("fast", fast)):
+            cpu = process_time()
+            body, seconds = timed(fn, repeat)
+            cpu = (process_time() - cpu) / repeat
+            print(f"{name:<12}{len(body):>12}{seconds * 1e3:>12.2f}{cpu * 1e3:>12.2f}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    app()
@@ -28,6 +28,7 @@ def crud_pokemon(
     title: str,
     user: str,
     host: str = "http://localhost",
+    batch_size: int = 100,
 ):
     """
     Catch them all!
@@ -45,6 +46,8 @@ def crud_pokemon(
 
     root: str : The root, as a string.
 
+    batch_size: int : Entries to upload per request.
+
     Returns
     -------
     List
@@ -76,25 +79,30 @@ def crud_pokemon(
 
     print("Uploading Martyrologies to server.")
 
-    with typer.progressbar(martyrology) as progress:
-        for entry in progress:
-            if "julian_date" not in entry.keys():
-                entry["julian_date"] = None
-            endpoint = f"{host}/api/v1/martyrology/"
-            data = {
-                "title": title,
-                "rubrics": None,
-                "parts": [],
-                "datestr": entry["datestr"],
-                "language": lang.lower(),
-                "old_date_template_id": template_id,
-                "julian_date": entry["julian_date"],
-            }
-            for par in entry["content"]:
-                data["parts"].append(
-                    {"prefix": None, "suffix": None, "rubrics": None, "content": par}
-                )
-            resp = client.post(endpoint, json=data)
+    items = []
+    for entry in martyrology:
+        if "julian_date" not in entry.keys():
+            entry["julian_date"] = None
+        data = {
+            "title": title,
+            "rubrics": None,
+            "parts": [],
+            "datestr": entry["datestr"],
+            "language": lang.lower(),
+            "old_date_template_id": template_id,
+            "julian_date": entry["julian_date"],
+        }
+        for par in entry["content"]:
+            data["parts"].append(
+                {"prefix": None, "suffix": None, "rubrics": None, "content": par}
+            )
+        items.append(data)
+
+    endpoint = f"{host}/api/v1/martyrology/bulk"
+    batches = [items[i : i + batch_size] for i in range(0, len(items), batch_size)]
+    with typer.progressbar(batches) as progress:
+        for batch in progress:
+            resp = client.post(endpoint, json=batch)
             assert resp.status_code == 200
 
 
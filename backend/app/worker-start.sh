@@ -3,4 +3,21 @@ set -e
 
 python /app/app/celeryworker_pre_start.py
 
-celery worker -A app.worker -l info -Q main-queue -c 1
+# Interactive and bulk work are served by separate workers, so a long bulk
+# job never holds up interactive requests.  Beat runs with the bulk worker.
+celery worker -A app.worker -l info -Q interactive-queue -n interactive@%h \
+    -c "${INTERACTIVE_CONCURRENCY:-2}" &
+pids="$!"
+celery worker -A app.worker -l info -Q bulk-queue -n bulk@%h \
+    -c "${BULK_CONCURRENCY:-$(nproc)}" -B -s /tmp/celerybeat-schedule &
+pids="$pids $!"
+
+# Pass docker's SIGTERM on, so both workers shut down warm
+trap 'kill -TERM $pids 2>/dev/null; wait' TERM INT
+
+# Stop the container if either worker exits, stopping the other first
+status=0
+wait -n || status=$?
+kill -TERM $pids 2>/dev/null || true
+wait || true
+exit $status